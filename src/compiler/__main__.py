@@ -9,8 +9,7 @@ from typing import Any
 from compiler.assembler import assemble_and_get_executable
 from compiler.assembly_generator import generate_assembly
 from compiler.ir_generator import generate_ir
-from compiler.parser import parse
-from compiler.tokenizer import tokenize
+from compiler.parser import parse_cached
 from compiler.typechecker import typecheck
 
 
@@ -18,7 +17,7 @@ def call_compiler(source_code: str) -> bytes:
     # Call your compiler here and return the compiled executable.
     # Raise an exception on compilation error.
     try:
-        parsed_code = parse(tokenize(source_code))
+        parsed_code = parse_cached(source_code)
         # generate_ir() does the typechecking
         assembly_code = generate_assembly(
             generate_ir(None, parsed_code))
@@ -1,143 +1,484 @@
 import dataclasses
+from io import StringIO
+from typing import IO, Callable
 
 from compiler import intrinsics, my_ir
 
 
+# callee-saved registers available to the register allocator;
+# %rax and %rdx are left alone because the intrinsics use them as scratch
+_ALLOC_REGISTERS = ['%rbx', '%r12', '%r13', '%r14', '%r15']
+
+
+def liveness(instructions: list[my_ir.Instruction]) -> dict[my_ir.IRVar, tuple[int, int]]:
+    """Returns the live range (first use, last use) of every IR variable,
+    as indexes into the instruction list. A variable live across a backward
+    jump stays live until the jump, so loop-carried values are not clobbered."""
+    ranges: dict[my_ir.IRVar, list[int]] = {}
+    label_index: dict[str, int] = {}
+
+    for i, insn in enumerate(instructions):
+        if isinstance(insn, my_ir.Label):
+            label_index[insn.name] = i
+        insn_class = type(insn)
+        used: list[my_ir.IRVar] = []
+        for field_name in insn_class.__ir_var_fields__:
+            if field_name == "fun":
+                # the called function never needs a storage location
+                continue
+            used.append(getattr(insn, field_name))
+        for field_name in insn_class.__ir_var_list_fields__:
+            used.extend(getattr(insn, field_name))
+        for var in used:
+            live_range = ranges.get(var)
+            if live_range is None:
+                ranges[var] = [i, i]
+            else:
+                live_range[1] = i
+
+    # collect backward edges (a jump to an earlier label)
+    backward_edges: list[tuple[int, int]] = []
+    for j, insn in enumerate(instructions):
+        if isinstance(insn, my_ir.Jump):
+            targets = [insn.label.name]
+        elif isinstance(insn, my_ir.CondJump):
+            targets = [insn.then_label.name, insn.else_label.name]
+        else:
+            continue
+        for target in targets:
+            target_index = label_index[target]
+            if target_index < j:
+                backward_edges.append((target_index, j))
+
+    # any variable whose range overlaps a loop body must survive the whole loop
+    changed = bool(backward_edges)
+    while changed:
+        changed = False
+        for target_index, j in backward_edges:
+            for live_range in ranges.values():
+                if live_range[0] <= j and target_index <= live_range[1] < j:
+                    live_range[1] = j
+                    changed = True
+
+    return {var: (live_range[0], live_range[1])
+            for var, live_range in ranges.items()}
+
+
 class Locals:
-    """Knows the memory location of every local variable."""
+    """Knows the storage location of every local variable.
+
+    Runs a linear-scan register allocator over the live ranges, so
+    short-lived temporaries get a callee-saved register and only the
+    variables that do not fit spill to a stack slot."""
     _var_to_location: dict[my_ir.IRVar, str]
     _stack_used: int
+    _used_registers: list[str]
 
-    def __init__(self, variables: list[my_ir.IRVar]) -> None:
+    def __init__(self, instructions: list[my_ir.Instruction]) -> None:
         self._var_to_location = {}
-        self._stack_used = 0
+        self._used_registers = []
+        ranges = liveness(instructions)
+        free_registers = list(_ALLOC_REGISTERS)
+        # currently register-resident variables as (last use, variable)
+        active: list[tuple[int, my_ir.IRVar]] = []
         offset = 0
-        for var in variables:
+
+        def spill(var: my_ir.IRVar) -> None:
+            nonlocal offset
             offset -= 8
             self._var_to_location[var] = f"{offset}(%rbp)"
-        self._stack_used = abs(offset)
 
-    def get_ref(self, v: my_ir.IRVar) -> str:
-        """Returns an Assembly reference like `-24(%rbp)`
-        for the memory location that stores the given variable"""
-        return self._var_to_location[v]
+        for var in sorted(ranges, key=lambda v: ranges[v][0]):
+            start, end = ranges[var]
+            # expire variables whose live range has ended
+            still_active = []
+            for active_end, active_var in active:
+                if active_end < start:
+                    free_registers.append(
+                        self._var_to_location[active_var])
+                else:
+                    still_active.append((active_end, active_var))
+            active = still_active
+
+            if free_registers:
+                register = free_registers.pop()
+                self._var_to_location[var] = register
+                if register not in self._used_registers:
+                    self._used_registers.append(register)
+                active.append((end, var))
+                active.sort(key=lambda pair: pair[0])
+            else:
+                # spill whichever conflicting variable is live the longest
+                furthest_end, furthest_var = active[-1]
+                if furthest_end > end:
+                    self._var_to_location[var] = \
+                        self._var_to_location[furthest_var]
+                    spill(furthest_var)
+                    active[-1] = (end, var)
+                    active.sort(key=lambda pair: pair[0])
+                else:
+                    spill(var)
+
+        # the used callee-saved registers are preserved in their own slots
+        self._register_save_slots = []
+        for register in self._used_registers:
+            offset -= 8
+            self._register_save_slots.append((register, f"{offset}(%rbp)"))
+        self._stack_used = abs(offset)
+        # the bound dict lookup makes get_ref a single C-level call;
+        # it returns a reference like `%rbx` or `-24(%rbp)`
+        self.get_ref = self._var_to_location.__getitem__
 
     def stack_used(self) -> int:
         """Returns the number of bytes of stack space needed for the local variables."""
         return self._stack_used
 
+    def register_save_slots(self) -> list[tuple[str, str]]:
+        """Returns (register, stack slot) pairs for the callee-saved
+        registers the allocator handed out."""
+        return self._register_save_slots
 
-def get_all_ir_variables(instructions: list[my_ir.Instruction]) -> list[my_ir.IRVar]:
-    result_list: list[my_ir.IRVar] = []
-    result_set: set[my_ir.IRVar] = set()
 
-    def add(v: my_ir.IRVar) -> None:
-        if v not in result_set:
-            result_list.append(v)
-            result_set.add(v)
+def get_all_ir_variables(instructions: list[my_ir.Instruction]) -> list[my_ir.IRVar]:
+    # a dict keeps insertion order and deduplicates at the same time,
+    # so each variable is hashed and stored only once
+    seen: dict[my_ir.IRVar, None] = {}
 
+    # each IR class declares which of its fields hold IRVars, so no
+    # type checks or field reflection are needed here at all
     for insn in instructions:
-        for field in dataclasses.fields(insn):
-            value = getattr(insn, field.name)
-            if isinstance(value, my_ir.IRVar):
-                add(value)
-            elif isinstance(value, list):
-                for v in value:
-                    if isinstance(v, my_ir.IRVar):
-                        add(v)
+        insn_class = type(insn)
+        for field_name in insn_class.__ir_var_fields__:
+            seen[getattr(insn, field_name)] = None
+        for field_name in insn_class.__ir_var_list_fields__:
+            for v in getattr(insn, field_name):
+                seen[v] = None
 
-    return result_list
+    return list(seen)
 
 
-def generate_assembly(instructions: list[my_ir.Instruction]) -> str:
-    lines = []
+# functions will not have more parameters than 6
+_PARAM_REGISTERS = ['%rdi', '%rsi', '%rdx', '%rcx', '%r8', '%r9']
 
-    def emit(line: str) -> None:
-        lines.append(line)
 
-    locals = Locals(
-        variables=get_all_ir_variables(instructions)
-    )
+def _emit_label(insn: my_ir.Label, get_ref: Callable[[my_ir.IRVar], str], emit: Callable[[str], None]) -> None:
+    emit("")
+    emit(f'.L{insn.name}:')
 
-    # functions will not have more parameters than 6
-    param_registers = ['%rdi', '%rsi', '%rdx', '%rcx', '%r8', '%r9']
 
-    emit('.extern print_int')
-    emit('.extern print_bool')
-    emit('.extern read_int')
-    emit('.global main')
-    emit('.type main, @ function')
+def _emit_load_int_const(insn: my_ir.LoadIntConst, get_ref: Callable[[my_ir.IRVar], str], emit: Callable[[str], None]) -> None:
+    dest_ref = get_ref(insn.dest)
+    if -2**31 <= insn.value < 2**31:
+        emit(f'movq ${insn.value}, {dest_ref}')
+    else:
+        emit(f'movabsq ${insn.value}, %rax')
+        emit(f'movq %rax, {dest_ref}')
 
-    emit('.section .text')
 
-    emit('main:')
-    emit('pushq %rbp')
-    emit('movq %rsp, %rbp')
-    emit(f'subq ${locals.stack_used()}, %rsp')
+def _emit_load_bool_const(insn: my_ir.LoadBoolConst, get_ref: Callable[[my_ir.IRVar], str], emit: Callable[[str], None]) -> None:
+    if insn.value == True:
+        emit(f'movq ${1}, {get_ref(insn.dest)}')
+    else:
+        emit(f'movq ${0}, {get_ref(insn.dest)}')
 
-    for insn in instructions:
-        emit('# ' + str(insn))
-        match insn:
-            case my_ir.Label():
-                emit("")
-                emit(f'.L{insn.name}:')
-            case my_ir.LoadIntConst():
-                if -2**31 <= insn.value < 2**31:
-                    emit(f'movq ${insn.value}, {locals.get_ref(insn.dest)}')
-                else:
-                    emit(f'movabsq ${insn.value}, %rax')
-                    emit(f'movq %rax, {locals.get_ref(insn.dest)}')
-            case my_ir.LoadBoolConst():
-                if insn.value == True:
-                    emit(f'movq ${1}, {locals.get_ref(insn.dest)}')
-                else:
-                    emit(f'movq ${0}, {locals.get_ref(insn.dest)}')
-            case my_ir.Copy():
-                emit(f'movq {locals.get_ref(insn.source)}, %rax')
-                emit(f'movq %rax, {locals.get_ref(insn.dest)}')
-            case my_ir.Jump():
-                emit(f'jmp .L{insn.label.name}')
-            case my_ir.CondJump():
-                emit(f'cmpq $0, {locals.get_ref(insn.cond)}')
-                emit(f'jne .L{insn.then_label.name}')
-                emit(f'jmp .L{insn.else_label.name}')
-            case my_ir.Call():
-                if len(insn.args) > 6:
-                    raise Exception("Max 6 arguments for functions")
-                refs = []
-                for arg in insn.args:
-                    refs.append(locals.get_ref(arg))
-                if insn.fun.name in intrinsics.all_intrinsics:
-                    args = intrinsics.IntrinsicArgs(refs,
-                                                    r'%rax',
-                                                    emit)
-                    # call intrinsic function
-                    intrinsics.all_intrinsics[insn.fun.name](args)
-                    emit(f'movq %rax, {locals.get_ref(insn.dest)}')
-                else:
-                    for arg, register in zip(insn.args, param_registers):
-                        # put arguments into registers
-                        emit(f'movq {locals.get_ref(arg)}, {register}')
-                    # all normal functions
-                    match insn.fun.name:
-                        case "or":
-                            emit(f"movq {refs[1]}, %rax")
-                            emit(f"orq {refs[0]}, %rax")
-                            emit(f'movq %rax, {locals.get_ref(insn.dest)}')
-                        case "and":
-                            emit(f"movq {refs[1]}, %rax")
-                            emit(f"andq {refs[0]}, %rax")
-                            emit(f'movq %rax, {locals.get_ref(insn.dest)}')
-                        case _:
-                            # all other functions
-                            emit(f"callq {insn.fun.name}")
-                            emit(f'movq %rax, {locals.get_ref(insn.dest)}')
 
+def _emit_copy(insn: my_ir.Copy, get_ref: Callable[[my_ir.IRVar], str], emit: Callable[[str], None]) -> None:
+    emit(f'movq {get_ref(insn.source)}, %rax')
+    emit(f'movq %rax, {get_ref(insn.dest)}')
+
+
+def _emit_jump(insn: my_ir.Jump, get_ref: Callable[[my_ir.IRVar], str], emit: Callable[[str], None]) -> None:
+    emit(f'jmp .L{insn.label.name}')
+
+
+def _emit_cond_jump(insn: my_ir.CondJump, get_ref: Callable[[my_ir.IRVar], str], emit: Callable[[str], None]) -> None:
+    emit(f'cmpq $0, {get_ref(insn.cond)}')
+    emit(f'jne .L{insn.then_label.name}')
+    emit(f'jmp .L{insn.else_label.name}')
+
+
+def _emit_call(insn: my_ir.Call, get_ref: Callable[[my_ir.IRVar], str], emit: Callable[[str], None]) -> None:
+    if len(insn.args) > 6:
+        raise Exception("Max 6 arguments for functions")
+    refs = []
+    for arg in insn.args:
+        refs.append(get_ref(arg))
+    dest_ref = get_ref(insn.dest)
+    if insn.fun.name in intrinsics.all_intrinsics:
+        args = intrinsics.IntrinsicArgs(refs,
+                                        r'%rax',
+                                        emit)
+        # call intrinsic function
+        intrinsics.all_intrinsics[insn.fun.name](args)
+        emit(f'movq %rax, {dest_ref}')
+    else:
+        for ref, register in zip(refs, _PARAM_REGISTERS):
+            # put arguments into registers
+            emit(f'movq {ref}, {register}')
+        # all normal functions
+        match insn.fun.name:
+            case "or":
+                emit(f"movq {refs[1]}, %rax")
+                emit(f"orq {refs[0]}, %rax")
+                emit(f'movq %rax, {dest_ref}')
+            case "and":
+                emit(f"movq {refs[1]}, %rax")
+                emit(f"andq {refs[0]}, %rax")
+                emit(f'movq %rax, {dest_ref}')
             case _:
-                raise Exception("Not implemented!")
+                # all other functions
+                emit(f"callq {insn.fun.name}")
+                emit(f'movq %rax, {dest_ref}')
+
+
+def peephole(lines: list[str]) -> list[str]:
+    """Walks the emitted lines with a small window and rewrites local patterns:
+    self-copies through %rax are dropped, runs of zero-stores share one
+    `xorq %rax, %rax`, and a label directly following another label is merged
+    into it (jumps to the dropped label are redirected)."""
+    # first pass: find labels that directly follow another label
+    # (only blank lines and comments in between) and alias them to it
+    label_aliases: dict[str, str] = {}
+    previous_label: str | None = None
+    for line in lines:
+        if line.endswith(":") and line.startswith(".L"):
+            name = line[:-1]
+            if previous_label is not None:
+                # follow chains so every alias points at the surviving label
+                label_aliases[name] = label_aliases.get(
+                    previous_label, previous_label)
+            else:
+                previous_label = name
+        elif line and not line.startswith("#"):
+            previous_label = None
 
-    emit('movq %rbp, %rsp')
-    emit('popq %rbp')
-    emit('ret')
+    result: list[str] = []
+    # True while %rax is known to hold zero from an earlier xorq
+    rax_is_zero = False
+    i = 0
+    end = len(lines)
+    while i < end:
+        line = lines[i]
 
-    return "\n".join(lines)
+        if line.startswith("#") or not line:
+            result.append(line)
+            i += 1
+            continue
+
+        rewritten = False
+        if line.startswith("movq ") and line.endswith(", %rax"):
+            # drop `movq X, %rax` + `movq %rax, X` pairs (a no-op copy);
+            # comment lines may not appear between the two halves
+            source = line[len("movq "):-len(", %rax")]
+            if i + 1 < end and lines[i + 1] == f"movq %rax, {source}":
+                i += 2
+                rewritten = True
+
+        elif line.startswith("movq $0, "):
+            dest = line[len("movq $0, "):]
+            if not rax_is_zero:
+                result.append("xorq %rax, %rax")
+                rax_is_zero = True
+            result.append(f"movq %rax, {dest}")
+            i += 1
+            rewritten = True
+
+        elif line.endswith(":") and line.startswith(".L"):
+            if line[:-1] in label_aliases:
+                # merged into the preceding label
+                i += 1
+                rewritten = True
+
+        if rewritten:
+            continue
+
+        if label_aliases and (line.startswith("jmp ") or line.startswith("jne ")):
+            target = line.split()[-1]
+            alias = label_aliases.get(target)
+            if alias is not None:
+                line = f"{line.split()[0]} {alias}"
+
+        # any other instruction (or control flow joining at a label)
+        # invalidates the known value of %rax
+        rax_is_zero = False
+        result.append(line)
+        i += 1
+
+    return result
+
+
+def _const_value(insn: my_ir.Instruction) -> int | None:
+    """Returns the integer value of a constant load, or None for anything else."""
+    if type(insn) is my_ir.LoadIntConst and -2**31 <= insn.value < 2**31:
+        return insn.value
+    if type(insn) is my_ir.LoadBoolConst:
+        return int(insn.value)
+    return None
+
+
+def _match_select(
+    instructions: list[my_ir.Instruction],
+    i: int,
+    label_uses: dict[str, int],
+) -> tuple[my_ir.IRVar, int, int, my_ir.IRVar, int] | None:
+    """Matches an if-then-else diamond at index i where both arms only load
+    a constant into the same variable. Returns (cond, then value, else value,
+    dest, instructions consumed), or None if the shape does not match.
+    The diamond can then be lowered to a cmov instead of two branches."""
+    cond_jump = instructions[i]
+    assert type(cond_jump) is my_ir.CondJump
+    then_name = cond_jump.then_label.name
+    else_name = cond_jump.else_label.name
+    # both arm labels may only be entered through this jump
+    if label_uses.get(then_name) != 1 or label_uses.get(else_name) != 1:
+        return None
+
+    def arm(j: int) -> tuple[int, my_ir.IRVar, int] | None:
+        """Matches one arm starting at j: a constant load, optionally
+        copied into a result variable. Returns (value, dest, next index)."""
+        if j >= len(instructions):
+            return None
+        load = instructions[j]
+        value = _const_value(load)
+        if value is None:
+            return None
+        assert isinstance(load, (my_ir.LoadIntConst, my_ir.LoadBoolConst))
+        dest = load.dest
+        if j + 1 < len(instructions):
+            copy = instructions[j + 1]
+            if type(copy) is my_ir.Copy and copy.source == dest:
+                return value, copy.dest, j + 2
+        return value, dest, j + 1
+
+    if i + 1 >= len(instructions):
+        return None
+    then_label = instructions[i + 1]
+    if type(then_label) is not my_ir.Label or then_label.name != then_name:
+        return None
+    then_arm = arm(i + 2)
+    if then_arm is None:
+        return None
+    then_value, then_dest, j = then_arm
+
+    if j + 1 >= len(instructions):
+        return None
+    jump = instructions[j]
+    else_label = instructions[j + 1]
+    if type(jump) is not my_ir.Jump or type(else_label) is not my_ir.Label \
+            or else_label.name != else_name:
+        return None
+    end_name = jump.label.name
+    else_arm = arm(j + 2)
+    if else_arm is None:
+        return None
+    else_value, else_dest, k = else_arm
+
+    if then_dest != else_dest:
+        return None
+    if k >= len(instructions):
+        return None
+    end_label = instructions[k]
+    if type(end_label) is not my_ir.Label or end_label.name != end_name:
+        return None
+
+    # the end label is left in place for any other jumps that target it
+    return cond_jump.cond, then_value, else_value, then_dest, k - i
+
+
+# maps each instruction class to its emitter, so the main loop dispatches
+# with one dict lookup instead of matching against every class in turn
+_HANDLERS: dict[type, Callable] = {
+    my_ir.Label: _emit_label,
+    my_ir.LoadIntConst: _emit_load_int_const,
+    my_ir.LoadBoolConst: _emit_load_bool_const,
+    my_ir.Copy: _emit_copy,
+    my_ir.Jump: _emit_jump,
+    my_ir.CondJump: _emit_cond_jump,
+    my_ir.Call: _emit_call,
+}
+
+
+def write_assembly(instructions: list[my_ir.Instruction], out: IO[str]) -> None:
+    """Writes the program's assembly to the given text stream, one line at
+    a time, so no string the size of the whole program is ever built."""
+    lines: list[str] = []
+    # bound append avoids a Python-level closure call per emitted line;
+    # it is also handed to the per-instruction emitters as their emit callback
+    append = lines.append
+
+    locals = Locals(instructions)
+    # bound once, so the hot emission loop below skips the attribute lookups
+    get_ref = locals.get_ref
+
+    append('.extern print_int')
+    append('.extern print_bool')
+    append('.extern read_int')
+    append('.global main')
+    append('.type main, @ function')
+
+    append('.section .text')
+
+    append('main:')
+    append('pushq %rbp')
+    append('movq %rsp, %rbp')
+    append(f'subq ${locals.stack_used()}, %rsp')
+    for register, slot in locals.register_save_slots():
+        # preserve the callee-saved registers the allocator handed out
+        append(f'movq {register}, {slot}')
+
+    # how many jumps target each label, for the branchless-select rewrite
+    label_uses: dict[str, int] = {}
+    for insn in instructions:
+        if type(insn) is my_ir.Jump:
+            targets = [insn.label.name]
+        elif type(insn) is my_ir.CondJump:
+            targets = [insn.then_label.name, insn.else_label.name]
+        else:
+            continue
+        for target in targets:
+            label_uses[target] = label_uses.get(target, 0) + 1
+
+    i = 0
+    end = len(instructions)
+    while i < end:
+        insn = instructions[i]
+        if type(insn) is my_ir.CondJump:
+            select = _match_select(instructions, i, label_uses)
+            if select is not None:
+                # both arms only load a constant, so a cmov replaces the
+                # two branches of the diamond
+                cond, then_value, else_value, dest, consumed = select
+                append('# branchless select: ' + str(insn))
+                # %rcx first: the peephole turns `movq $0, X` into an
+                # `xorq %rax, %rax` plus a store, so the %rax load must
+                # come after any zero written to %rcx, not before it
+                append(f'movq ${then_value}, %rcx')
+                append(f'movq ${else_value}, %rax')
+                append(f'cmpq $0, {get_ref(cond)}')
+                append('cmovneq %rcx, %rax')
+                append(f'movq %rax, {get_ref(dest)}')
+                i += consumed
+                continue
+        append('# ' + str(insn))
+        handler = _HANDLERS.get(type(insn))
+        if handler is None:
+            raise Exception("Not implemented!")
+        handler(insn, get_ref, append)
+        i += 1
+
+    for register, slot in locals.register_save_slots():
+        append(f'movq {slot}, {register}')
+    append('movq %rbp, %rsp')
+    append('popq %rbp')
+    append('ret')
+
+    write = out.write
+    for line in peephole(lines):
+        write(line)
+        write('\n')
+
+
+def generate_assembly(instructions: list[my_ir.Instruction]) -> str:
+    out = StringIO()
+    write_assembly(instructions, out)
+    return out.getvalue()
@@ -1,5 +1,7 @@
+import operator
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, Generic, Self, Tuple, TypeVar
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Generic, Mapping, Self, Tuple, TypeVar
 
 from compiler import my_ast
 from compiler.my_ast import Expression
@@ -7,34 +9,45 @@ from compiler.my_ast import Expression
 type Value = int | bool | None | Expression | Callable | Tuple[my_ast.Expression, ...]
 T = TypeVar("T")
 
-DEFAULT_LOCALS: Dict[str, Value] = {
-    "+": lambda a, b:  a + b,
-    "-": lambda a, b: a - b,
-    "unary_-": lambda a: -a,
-    "*": lambda a, b:  a * b,
-    "/": lambda a, b:  a / b,
-    "%": lambda a, b:  a % b,
-    "<": lambda a, b:  a < b,
-    "<=": lambda a, b:  a <= b,
-    ">": lambda a, b:  a > b,
-    ">=": lambda a, b:  a >= b,
-    "==": lambda a, b:  a == b,
-    "!=": lambda a, b:  a != b,
-    "or": lambda a, b:  a or b,
-    "and": lambda a, b:  a and b,
-    "unary_not": lambda a: not a,
-    "while": lambda a, b:  a / b,
+# the built-in operators are C-level functions from the operator module,
+# so calling them does not create a new Python frame
+BINARY_OPS: Dict[str, Callable] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "or": lambda a, b: a or b,
+    "and": lambda a, b: a and b,
+}
+
+UNARY_OPS: Dict[str, Callable] = {
+    "unary_-": operator.neg,
+    "unary_not": operator.not_,
+}
+
+# a read-only view: the built-ins are shared by every program and every
+# scope, so nothing ever needs to copy them
+DEFAULT_LOCALS: Mapping[str, Value] = MappingProxyType({
     "print_int": lambda i: print(str(i) + "\n"),
     "print_bool": lambda b: print(str(b).lower() + "\n"),
     "read_int": lambda: int(input()),
     "print_int_params": tuple([my_ast.Identifier("i")]),
     "print_bool_params": tuple([my_ast.Identifier("b")]),
     "read_int_params": tuple([])
-}
+})
 
 
-@dataclass(init=False)
+@dataclass(init=False, slots=True)
 class SymTable(Generic[T]):
+    """A chain of scopes. lookup and change walk the parent chain once,
+    using containment checks so falsy stored values behave correctly."""
     locals: Dict[str, T]
     parent: Self | None
 
@@ -52,161 +65,319 @@ class SymTable(Generic[T]):
         return None
 
     def lookup(self, name: str) -> T | None:
-        if name in self.locals:
-            return self.locals.get(name)
-        elif self.parent:
-            return self.parent.lookup(name)
+        # iterative walk: no recursion frame per scope level
+        table: "SymTable[T]" | None = self
+        while table is not None:
+            if name in table.locals:
+                return table.locals[name]
+            table = table.parent
         return None
 
     def change(self, name: str, new_value: T) -> None:
-        if not name in self.locals:
-            if self.parent is None:
-                raise Exception(f"{name} does not exist in the symbol table")
-            self.parent.change(name, new_value)
-        else:
-            self.locals[name] = new_value
-
-
-def interpret(node: my_ast.Expression | None, sym_table: SymTable | None = None) -> Value:
-    if node is None:
+        table: "SymTable[T]" | None = self
+        while table is not None:
+            if name in table.locals:
+                table.locals[name] = new_value
+                return
+            table = table.parent
+        raise Exception(f"{name} does not exist in the symbol table")
+
+
+# Opcodes for the bytecode produced by compile_to_bc().
+# Each bytecode is a (opcode, arg) tuple; jump targets are indexes into the code list.
+PUSH_CONST = 0
+LOAD_SLOT = 1
+LOAD_BUILTIN = 2
+DECLARE_VAR = 3
+STORE_SLOT = 4
+POP_VALUE = 5
+UNARY_OP = 6
+BINARY_OP = 7
+SC_OR = 8
+SC_AND = 9
+JUMP = 10
+JUMP_IF_FALSE = 11
+CALL_FUNC = 12
+RAISE_ASSIGN = 13
+
+
+def compile_to_bc(node: my_ast.Expression) -> Tuple[list[Tuple[int, Any]], int]:
+    """Compiles an AST to a flat list of (opcode, arg) bytecodes for interpret().
+    Returns the bytecode and the number of variable slots the code needs.
+    Variable names are resolved to slot indexes here, so at runtime a load or
+    store is a single indexed access instead of a walk up a chain of symbol tables."""
+    code: list[Tuple[int, Any]] = []
+    # one dict per open scope, mapping a variable name to its slot index
+    scopes: list[Dict[str, int]] = [{}]
+    slot_count = 0
+
+    def resolve(name: str) -> int | None:
+        for scope in reversed(scopes):
+            if name in scope:
+                return scope[name]
         return None
-    if sym_table is None:
-        sym_table = SymTable[Value](locals=DEFAULT_LOCALS.copy(), parent=None)
-
-    match node:
-        case my_ast.Literal():
-            return node.value
-
-        case my_ast.Variable():
-            # this works te same for both normal vars and functions
-            sym_table.add(node.name, node.value)
-            return None
-
-        case my_ast.Identifier():
-            value = sym_table.lookup(node.name)
-
-            if value is None:
-                exception_text = f"'{node.name}' is not defined"
-                if node.name == "True":
-                    exception_text = f"'{node.name}' is not defined, did you mean 'true'?"
-                elif node.name == "False":
-                    exception_text = f"'{node.name}' is not defined, did you mean 'false'?"
-                raise Exception(exception_text)
-
-            if isinstance(value, my_ast.Expression):
-                return interpret(value, sym_table)
-            return value
-
-        case my_ast.UnaryOp():
-            target: Any = interpret(node.target, sym_table)
-            unary_func = sym_table.lookup(node.op)
-
-            if not unary_func:
-                raise Exception(f"Invalid operator '{node.op}' for UnaryOp")
-            if not callable(unary_func):
-                raise Exception(f"{node.op} is not callable")
-
-            return unary_func(target)
-
-        case my_ast.BinaryOp():
-            a: Any = interpret(node.left, sym_table)
-            # evaluate short-circuiting operators before interpreting the right side
-            if node.op == "or" and a == True:
-                return True
-            elif node.op == "and" and a == False:
-                return False
-            b: Any = interpret(node.right, sym_table)
-
-            if node.op == "=":
-                if not isinstance(node.left, my_ast.Identifier):
-                    raise Exception(
-                        f"{node.left} is not an identifier, so it cannot be assigned to (assigning to functions is not allowed)")
-                sym_table.change(node.left.name, b)
-                return None
-
-            binary_func = sym_table.lookup(node.op)
 
-            if not binary_func:
-                raise Exception(f"Invalid operator '{node.op}' for BinaryOp")
-            if not callable(binary_func):
-                raise Exception(f"{node.op} is not callable")
-
-            return binary_func(a, b)
-
-        case my_ast.IfThen():
-            if interpret(node.if_expr, sym_table):
-                return interpret(node.then_expr, sym_table)
-            return None
+    def undefined_error(name: str) -> Exception:
+        exception_text = f"'{name}' is not defined"
+        if name == "True":
+            exception_text = f"'{name}' is not defined, did you mean 'true'?"
+        elif name == "False":
+            exception_text = f"'{name}' is not defined, did you mean 'false'?"
+        return Exception(exception_text)
+
+    def bc(node: my_ast.Expression) -> None:
+        nonlocal slot_count
+        match node:
+            case my_ast.Literal():
+                code.append((PUSH_CONST, node.value))
+
+            case my_ast.Identifier():
+                slot = resolve(node.name)
+                if slot is not None:
+                    code.append((LOAD_SLOT, slot))
+                elif node.name in DEFAULT_LOCALS:
+                    code.append((LOAD_BUILTIN, node.name))
+                else:
+                    raise undefined_error(node.name)
+
+            case my_ast.Variable():
+                # this works the same for both normal vars and functions;
+                # the value is evaluated before the name becomes visible
+                bc(node.value)
+                if node.name in scopes[-1]:
+                    raise Exception(
+                        f"Variable {node.name} was already in the symbol table")
+                scopes[-1][node.name] = slot_count
+                code.append((DECLARE_VAR, slot_count))
+                slot_count += 1
+
+            case my_ast.UnaryOp():
+                target_at = len(code)
+                bc(node.target)
+                # if the operand compiled to a single constant, apply the
+                # operator now instead of every time the code runs
+                if len(code) == target_at + 1 and code[target_at][0] == PUSH_CONST:
+                    unary_func = UNARY_OPS.get(node.op)
+                    if unary_func is not None:
+                        code[target_at] = (
+                            PUSH_CONST, unary_func(code[target_at][1]))
+                        return
+                code.append((UNARY_OP, node.op))
+
+            case my_ast.BinaryOp():
+                if node.op == "=":
+                    if isinstance(node.left, my_ast.Identifier):
+                        slot = resolve(node.left.name)
+                        if slot is None:
+                            raise undefined_error(node.left.name)
+                        bc(node.right)
+                        code.append((STORE_SLOT, slot))
+                    else:
+                        bc(node.left)
+                        code.append((POP_VALUE, None))
+                        bc(node.right)
+                        code.append((RAISE_ASSIGN, node.left))
+                    return
+
+                left_at = len(code)
+                bc(node.left)
+                left_is_const = (len(code) == left_at + 1
+                                 and code[left_at][0] == PUSH_CONST)
+                # short-circuiting operators skip the right side with a jump
+                sc_at = -1
+                if node.op == "or":
+                    sc_at = len(code)
+                    code.append((SC_OR, -1))
+                elif node.op == "and":
+                    sc_at = len(code)
+                    code.append((SC_AND, -1))
+                right_at = len(code)
+                bc(node.right)
+                # fold when both sides compiled to constants; this works
+                # bottom-up, so nested constant expressions collapse too
+                if (left_is_const and sc_at < 0
+                        and len(code) == right_at + 1
+                        and code[right_at][0] == PUSH_CONST):
+                    binary_func = BINARY_OPS.get(node.op)
+                    if binary_func is not None:
+                        try:
+                            folded = binary_func(
+                                code[left_at][1], code[right_at][1])
+                        except Exception:
+                            # e.g. division by zero: leave it to happen at runtime
+                            pass
+                        else:
+                            del code[left_at:]
+                            code.append((PUSH_CONST, folded))
+                            return
+                code.append((BINARY_OP, node.op))
+                if sc_at >= 0:
+                    code[sc_at] = (code[sc_at][0], len(code))
+
+            case my_ast.IfThen():
+                bc(node.if_expr)
+                jump_to_none = len(code)
+                code.append((JUMP_IF_FALSE, -1))
+                bc(node.then_expr)
+                jump_to_end = len(code)
+                code.append((JUMP, -1))
+                code[jump_to_none] = (JUMP_IF_FALSE, len(code))
+                code.append((PUSH_CONST, None))
+                code[jump_to_end] = (JUMP, len(code))
+
+            case my_ast.IfThenElse():
+                bc(node.if_expr)
+                jump_to_else = len(code)
+                code.append((JUMP_IF_FALSE, -1))
+                bc(node.then_expr)
+                jump_to_end = len(code)
+                code.append((JUMP, -1))
+                code[jump_to_else] = (JUMP_IF_FALSE, len(code))
+                bc(node.else_expr)
+                code[jump_to_end] = (JUMP, len(code))
+
+            case my_ast.TopLevel():
+                for child in node.expressions[:-1]:
+                    bc(child)
+                    code.append((POP_VALUE, None))
+                bc(node.expressions[-1])
+                if not node.returns_last:
+                    code.append((POP_VALUE, None))
+                    code.append((PUSH_CONST, None))
+
+            case my_ast.Block():
+                if len(node.expressions) == 0:
+                    code.append((PUSH_CONST, None))
+                    return
+                scopes.append({})
+                for child in node.expressions[:-1]:
+                    bc(child)
+                    code.append((POP_VALUE, None))
+                bc(node.expressions[-1])
+                if not node.returns_last:
+                    code.append((POP_VALUE, None))
+                    code.append((PUSH_CONST, None))
+                scopes.pop()
+
+            case my_ast.WhileDo():
+                # the condition and body are compiled once; each iteration
+                # just jumps back here instead of re-dispatching on the AST
+                loop_start = len(code)
+                bc(node.condition)
+                jump_to_end = len(code)
+                code.append((JUMP_IF_FALSE, -1))
+                bc(node.do_expr)
+                code.append((POP_VALUE, None))
+                code.append((JUMP, loop_start))
+                code[jump_to_end] = (JUMP_IF_FALSE, len(code))
+                code.append((PUSH_CONST, None))
+
+            case my_ast.FunctionCall():
+                for given_arg in node.args:
+                    bc(given_arg)
+                code.append((CALL_FUNC, (node.name, len(node.args))))
+
+            case _:
+                raise Exception(
+                    f"Interpreter is not implemented for node type {node}")
 
-        case my_ast.IfThenElse():
-            if interpret(node.if_expr, sym_table):
-                return interpret(node.then_expr, sym_table)
-            else:
-                return interpret(node.else_expr, sym_table)
+    bc(node)
+    return code, slot_count
 
-        case my_ast.TopLevel():
-            for i in range(len(node.expressions) - 1):
-                interpret(node.expressions[i], sym_table)
-            if node.returns_last:
-                return interpret(node.expressions[-1], sym_table)
-            else:
-                interpret(node.expressions[-1], sym_table)
-                return None
-
-        case my_ast.Block():
-            if len(node.expressions) == 0:
-                return None
-            block_sym_table = SymTable[Value](
-                locals=DEFAULT_LOCALS.copy(), parent=sym_table)
-            for i in range(len(node.expressions) - 1):
-                interpret(node.expressions[i], block_sym_table)
-            if node.returns_last:
-                return interpret(node.expressions[-1], block_sym_table)
-            else:
-                interpret(node.expressions[-1], block_sym_table)
-                return None
 
-        case my_ast.WhileDo():
-            while interpret(node.condition, sym_table):
-                interpret(node.do_expr, sym_table)
-            return None
+def interpret(node: my_ast.Expression | None) -> Value:
+    """Runs the program in a single Python frame: evaluation state lives on
+    an explicit value stack driven by the bytecode, so expression nesting
+    never consumes Python call-stack depth at runtime."""
+    if node is None:
+        return None
 
-        case my_ast.FunctionCall():
-            func = sym_table.lookup(node.name)
+    code, slot_count = compile_to_bc(node)
+    # flat environment indexed by the slots assigned in compile_to_bc()
+    env: list[Any] = [None] * slot_count
+    stack: list[Any] = []
+    pc = 0
+    end = len(code)
+    # opcode constants bound to locals: the dispatch loop then compares
+    # against fast locals instead of doing a global lookup per opcode test
+    (push_const, load_slot, load_builtin, declare_var, store_slot, pop_value,
+     unary_op, binary_op, sc_or, sc_and, jump, jump_if_false, call_func,
+     raise_assign) = (
+        PUSH_CONST, LOAD_SLOT, LOAD_BUILTIN, DECLARE_VAR, STORE_SLOT,
+        POP_VALUE, UNARY_OP, BINARY_OP, SC_OR, SC_AND, JUMP, JUMP_IF_FALSE,
+        CALL_FUNC, RAISE_ASSIGN)
+
+    while pc < end:
+        op, arg = code[pc]
+        pc += 1
+
+        if op == push_const:
+            stack.append(arg)
+
+        elif op == load_slot:
+            stack.append(env[arg])
+
+        elif op == load_builtin:
+            stack.append(DEFAULT_LOCALS[arg])
+
+        elif op == declare_var:
+            env[arg] = stack.pop()
+            stack.append(None)
+
+        elif op == store_slot:
+            env[arg] = stack.pop()
+            stack.append(None)
+
+        elif op == pop_value:
+            stack.pop()
+
+        elif op == unary_op:
+            unary_func = UNARY_OPS.get(arg)
+            if unary_func is None:
+                raise Exception(f"Invalid operator '{arg}' for UnaryOp")
+            stack.append(unary_func(stack.pop()))
+
+        elif op == binary_op:
+            binary_func = BINARY_OPS.get(arg)
+            if binary_func is None:
+                raise Exception(f"Invalid operator '{arg}' for BinaryOp")
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(binary_func(a, b))
+
+        elif op == sc_or:
+            # truthiness check, so the left value itself becomes the result
+            # (matches what 'a or b' would evaluate to in Python)
+            if stack[-1]:
+                pc = arg
+
+        elif op == sc_and:
+            if not stack[-1]:
+                pc = arg
+
+        elif op == jump:
+            pc = arg
+
+        elif op == jump_if_false:
+            if not stack.pop():
+                pc = arg
+
+        elif op == call_func:
+            name, arg_count = arg
+            func = DEFAULT_LOCALS.get(name)
             if not func:
-                raise Exception(f"Function {node.name} is not defined")
+                raise Exception(f"Function {name} is not defined")
             if not callable(func):
-                raise Exception(f"Function {node.name} is not callable!")
-
-            # interpret the arguments given to the function
-            interpreted_args = []
-            for given_arg in node.args:
-                interpreted_args.append(interpret(given_arg, sym_table))
-
-            if node.name in ["print_int", "print_bool", "read_int"] and callable(func):
-                return func(*interpreted_args)
-
-            raise Exception("Custom functions not implemented!")
-            """
-            # only go here if function was not built in
-            if len(interpreted_args) > len(func.params):
-                raise Exception(
-                    f"Too many arguments for function '{node.name}'")
-            if len(interpreted_args) < len(func.params):
-                raise Exception(
-                    f"Too few arguments for function '{node.name}'")
-
-            func_sym_table = SymTable[Value](
-                locals={}, parent=sym_table)
-            for func_param, interpreted_arg in zip(func.params, interpreted_args):
-                if not isinstance(func_param, my_ast.Identifier):
-                    raise Exception(
-                        f"Parameter '{func_param}' set for function was not an identifier'")
-                func_sym_table.add(
-                    func_param.name, interpreted_arg)
-            return interpret(func.expr, func_sym_table)
-            """
+                raise Exception(f"Function {name} is not callable!")
+            args = stack[len(stack) - arg_count:]
+            del stack[len(stack) - arg_count:]
+            if name in ["print_int", "print_bool", "read_int"]:
+                stack.append(func(*args))
+            else:
+                raise Exception("Custom functions not implemented!")
 
-        case _:
+        elif op == raise_assign:
             raise Exception(
-                f"Interpreter is not implemented for node type {node}")
+                f"{arg} is not an identifier, so it cannot be assigned to (assigning to functions is not allowed)")
+
+    return stack.pop() if stack else None
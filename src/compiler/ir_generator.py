@@ -1,12 +1,281 @@
-from typing import List
+from dataclasses import dataclass
+from typing import Callable, List
 
 from compiler import my_ast, my_ir, my_types
-from compiler.interpreter import DEFAULT_LOCALS, SymTable
+from compiler.interpreter import (BINARY_OPS, DEFAULT_LOCALS, UNARY_OPS,
+                                  SymTable)
 from compiler.my_types import Bool, Int
 from compiler.tokenizer import SourceLocation
 from compiler.typechecker import typecheck
 
 
+# which IR load instruction each literal value type uses; exact type keys,
+# so bool (a subclass of int) cannot be mistaken for an int
+_LIT_LOAD: dict[type, Callable[..., my_ir.Instruction]] = {
+    bool: my_ir.LoadBoolConst,
+    int: my_ir.LoadIntConst,
+}
+
+# the IRVar for each built-in operator, precomputed once: operators are a
+# fixed global set, so there is no need to walk the symbol-table chain for
+# them on every BinaryOp/UnaryOp visit (IRVar interning makes these the
+# same objects the root table holds)
+_OP_IRVAR: dict[str, my_ir.IRVar] = {
+    op: my_ir.IRVar(op) for op in (*BINARY_OPS, *UNARY_OPS)
+}
+
+
+@dataclass(slots=True)
+class _Ctx:
+    """Per-call state of generate_ir, passed to the module-level visit
+    handlers so they are compiled once at import instead of being
+    re-created as closures on every call."""
+    ins: list[my_ir.Instruction]
+    reserved_names: set[str]
+    # 'var_unit' is used when an expression's type is 'Unit'.
+    var_unit: my_ir.IRVar
+    # monotonic counters: each allocation is O(1) instead of scanning the
+    # reserved names from the start, and there is no cap on the count
+    next_var_id: int = 0
+    next_label_id: int = 0
+
+    def new_var(self) -> my_ir.IRVar:
+        while f"v{self.next_var_id}" in self.reserved_names:
+            self.next_var_id += 1
+        name = f"v{self.next_var_id}"
+        self.next_var_id += 1
+        self.reserved_names.add(name)
+        return my_ir.IRVar(name)
+
+    def new_label(self, loc: SourceLocation) -> my_ir.Label:
+        while f"L{self.next_label_id}" in self.reserved_names:
+            self.next_label_id += 1
+        name = f"L{self.next_label_id}"
+        self.next_label_id += 1
+        self.reserved_names.add(name)
+        return my_ir.Label(name, loc=loc)
+
+
+def _visit(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.Expression) -> my_ir.IRVar:
+    loc = expr.source_loc
+    if not loc:
+        raise Exception("Missing SourceLocation")
+    # one dict lookup on the node's class instead of matching
+    # against every node type in turn
+    handler = _VISIT_HANDLERS.get(type(expr))
+    if handler is None:
+        raise Exception("Expression not implemented")
+    return handler(ctx, sym_table, expr, loc)
+
+
+def _visit_literal(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.Literal, loc: SourceLocation) -> my_ir.IRVar:
+    load_class = _LIT_LOAD.get(type(expr.value))
+    if load_class is not None:
+        var = ctx.new_var()
+        ctx.ins.append(load_class(expr.value, var, loc=loc))
+        return var
+    if expr.value is None:
+        return ctx.var_unit
+    raise Exception(
+        f"{loc}: unsupported literal: {type(expr.value)}")
+
+
+def _visit_identifier(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.Identifier, loc: SourceLocation) -> my_ir.IRVar:
+    ir_var = sym_table.lookup(expr.name)
+    if not ir_var:
+        raise Exception(f"{expr.name} not found in IR Table")
+    return ir_var
+
+
+def _visit_variable(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.Variable, loc: SourceLocation) -> my_ir.IRVar:
+    if isinstance(expr.value, my_ast.Identifier) and not isinstance(expr.value.type, my_types.FunType):
+        # if value is an Identifier for a non-function value, make a copy to avoid aliasing
+        temp_var = _visit(ctx, sym_table, expr.value)
+        real_var = ctx.new_var()
+        ctx.ins.append(my_ir.Copy(temp_var, real_var, loc=loc))
+    else:
+        real_var = _visit(ctx, sym_table, expr.value)
+    sym_table.add(expr.name, real_var)
+    return ctx.var_unit
+
+
+def _visit_unary_op(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.UnaryOp, loc: SourceLocation) -> my_ir.IRVar:
+    visited_target = _visit(ctx, sym_table, expr.target)
+    var_op = _OP_IRVAR.get(expr.op) or sym_table.lookup(expr.op)
+    if not var_op:
+        raise Exception(f"{expr.op} not in SymTable")
+    var_result = ctx.new_var()
+    ctx.ins.append(my_ir.Call(
+        var_op, [visited_target], var_result, loc=loc))
+    return var_result
+
+
+def _visit_binary_op(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.BinaryOp, loc: SourceLocation) -> my_ir.IRVar:
+    ins = ctx.ins
+    if expr.op == "=":
+        if not isinstance(expr.left, my_ast.Identifier):
+            raise Exception(f"{expr.left} is not an identifier")
+
+        var_left = _visit(ctx, sym_table, expr.left)
+        var_right = _visit(ctx, sym_table, expr.right)
+        ins.append(my_ir.Copy(var_right, var_left, loc=loc))
+        if isinstance(expr.right.type, my_types.FunType):
+            # if assigning a function to a variable, change the name in the table too to be able to call it properly
+            sym_table.change(expr.left.name, var_right)
+        return var_left
+
+    if expr.op == "or" or expr.op == "and":
+        # standard control-flow lowering: when the left side already
+        # decides the result, the right side is never evaluated, and
+        # otherwise the result is simply the right side's value
+        l_sc = ctx.new_label(loc=loc)
+        l_rhs = ctx.new_label(loc=loc)
+        l_end = ctx.new_label(loc=loc)
+        var_result = ctx.new_var()
+        var_left = _visit(ctx, sym_table, expr.left)
+        if expr.op == "or":
+            ins.append(my_ir.CondJump(var_left, l_sc, l_rhs, loc=loc))
+        else:
+            ins.append(my_ir.CondJump(var_left, l_rhs, l_sc, loc=loc))
+        ins.append(l_sc)
+        ins.append(my_ir.LoadBoolConst(
+            expr.op == "or", var_result, loc=loc))
+        ins.append(my_ir.Jump(l_end, loc=loc))
+        ins.append(l_rhs)
+        var_right = _visit(ctx, sym_table, expr.right)
+        ins.append(my_ir.Copy(var_right, var_result, loc=loc))
+        ins.append(l_end)
+        return var_result
+
+    var_op = _OP_IRVAR.get(expr.op) or sym_table.lookup(expr.op)
+    if not var_op:
+        raise Exception(f"{expr.op} not found in IR Table")
+
+    var_result = ctx.new_var()
+    var_left = _visit(ctx, sym_table, expr.left)
+    var_right = _visit(ctx, sym_table, expr.right)
+    ins.append(my_ir.Call(
+        var_op, [var_left, var_right], var_result, loc=loc))
+    return var_result
+
+
+def _visit_if_then(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.IfThen, loc: SourceLocation) -> my_ir.IRVar:
+    l_then = ctx.new_label(loc=loc)
+    l_end = ctx.new_label(loc=loc)
+
+    var_cond = _visit(ctx, sym_table, expr.if_expr)
+
+    ctx.ins.append(my_ir.CondJump(var_cond, l_then, l_end, loc=loc))
+
+    ctx.ins.append(l_then)
+    _visit(ctx, sym_table, expr.then_expr)
+
+    ctx.ins.append(l_end)
+    return ctx.var_unit
+
+
+def _visit_if_then_else(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.IfThenElse, loc: SourceLocation) -> my_ir.IRVar:
+    ins = ctx.ins
+    l_then = ctx.new_label(loc=loc)
+    l_else = ctx.new_label(loc=loc)
+    l_end = ctx.new_label(loc=loc)
+
+    var_result = ctx.new_var()
+
+    var_cond = _visit(ctx, sym_table, expr.if_expr)
+    ins.append(my_ir.CondJump(var_cond, l_then, l_else, loc=loc))
+
+    ins.append(l_then)
+    then_result = _visit(ctx, sym_table, expr.then_expr)
+    ins.append(my_ir.Copy(then_result, var_result))
+    ins.append(my_ir.Jump(l_end, loc=loc))
+
+    ins.append(l_else)
+    else_result = _visit(ctx, sym_table, expr.else_expr)
+    ins.append(my_ir.Copy(else_result, var_result))
+
+    ins.append(l_end)
+    return var_result
+
+
+def _visit_while_do(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.WhileDo, loc: SourceLocation) -> my_ir.IRVar:
+    l_do = ctx.new_label(loc=loc)
+    l_end = ctx.new_label(loc=loc)
+
+    var_cond = _visit(ctx, sym_table, expr.condition)
+    ctx.ins.append(my_ir.CondJump(var_cond, l_do, l_end))
+
+    ctx.ins.append(l_do)
+    _visit(ctx, sym_table, expr.do_expr)
+    var_cond = _visit(ctx, sym_table, expr.condition)
+    ctx.ins.append(my_ir.CondJump(var_cond, l_do, l_end))
+
+    ctx.ins.append(l_end)
+    return ctx.var_unit
+
+
+def _visit_top_level(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.TopLevel, loc: SourceLocation) -> my_ir.IRVar:
+    if len(expr.expressions) == 0:
+        return ctx.var_unit
+    visited_toplevel_exprs: List[my_ir.IRVar] = []
+    for child_expr in expr.expressions:
+        visited_toplevel_exprs.append(_visit(ctx, sym_table, child_expr))
+
+    if expr.returns_last:
+        return visited_toplevel_exprs[-1]
+    return ctx.var_unit
+
+
+def _visit_block(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.Block, loc: SourceLocation) -> my_ir.IRVar:
+    if len(expr.expressions) == 0:
+        return ctx.var_unit
+    block_sym_table = SymTable[my_ir.IRVar](
+        locals={}, parent=sym_table)
+
+    visited_block_exprs: List[my_ir.IRVar] = []
+    for child_expr in expr.expressions:
+        visited_block_exprs.append(
+            _visit(ctx, block_sym_table, child_expr))
+
+    if expr.returns_last:
+        return visited_block_exprs[-1]
+    return ctx.var_unit
+
+
+def _visit_function_call(ctx: _Ctx, sym_table: SymTable[my_ir.IRVar], expr: my_ast.FunctionCall, loc: SourceLocation) -> my_ir.IRVar:
+    func = sym_table.lookup(expr.name)
+    if func is None:
+        raise Exception(
+            f"Function '{expr.name}' not found in SymTable")
+
+    var_result = ctx.new_var()
+
+    visited_args = []
+    for arg in expr.args:
+        visited_args.append(_visit(ctx, sym_table, arg))
+
+    ctx.ins.append(my_ir.Call(func, visited_args, var_result))
+    return var_result
+
+
+# built once at import: the handlers are plain module functions, so no
+# closure construction happens per generate_ir call (Callable[..., ...]:
+# each handler narrows the expr parameter to its own node class)
+_VISIT_HANDLERS: dict[type, Callable[..., my_ir.IRVar]] = {
+    my_ast.Literal: _visit_literal,
+    my_ast.Identifier: _visit_identifier,
+    my_ast.Variable: _visit_variable,
+    my_ast.UnaryOp: _visit_unary_op,
+    my_ast.BinaryOp: _visit_binary_op,
+    my_ast.IfThen: _visit_if_then,
+    my_ast.IfThenElse: _visit_if_then_else,
+    my_ast.WhileDo: _visit_while_do,
+    my_ast.TopLevel: _visit_top_level,
+    my_ast.Block: _visit_block,
+    my_ast.FunctionCall: _visit_function_call,
+}
+
+
 def generate_ir(
     reserved_names: set[str] | None,
     root_expr: my_ast.Expression
@@ -14,237 +283,28 @@ def generate_ir(
     if isinstance(root_expr, my_ast.EmptyExpression):
         return []
     if reserved_names is None:
-        reserved_names = set(DEFAULT_LOCALS.copy().keys())
-    # 'var_unit' is used when an expression's type is 'Unit'.
-    var_unit = my_ir.IRVar('unit')
-
-    def new_var() -> my_ir.IRVar:
-        for i in range(1000):
-            if f"v{i}" not in reserved_names:
-                reserved_names.add(f"v{i}")
-                return my_ir.IRVar(f"v{i}")
-        raise Exception("Ran out of variables!")
-
-    def new_label(loc: SourceLocation) -> my_ir.Label:
-        for i in range(1000):
-            if f"L{i}" not in reserved_names:
-                reserved_names.add(f"L{i}")
-                return my_ir.Label(f"L{i}", loc=loc)
-        raise Exception("Ran out of labels!")
-
-    ins: list[my_ir.Instruction] = []
-
-    def visit(sym_table: SymTable[my_ir.IRVar], expr: my_ast.Expression) -> my_ir.IRVar:
-        loc = expr.source_loc
-        if not loc:
-            raise Exception("Missing SourceLocation")
-
-        match expr:
-            case my_ast.Literal():
-                match expr.value:
-                    case bool():
-                        var = new_var()
-                        ins.append(my_ir.LoadBoolConst(
-                            expr.value, var, loc=loc))
-                    case int():
-                        var = new_var()
-                        ins.append(my_ir.LoadIntConst(
-                            expr.value, var, loc=loc))
-                    case None:
-                        var = var_unit
-                    case _:
-                        raise Exception(
-                            f"{loc}: unsupported literal: {type(expr.value)}")
-
-                return var
-
-            case my_ast.Identifier():
-                ir_var = sym_table.lookup(expr.name)
-                if not ir_var:
-                    raise Exception(f"{expr.name} not found in IR Table")
-                return ir_var
-
-            case my_ast.Variable():
-                if isinstance(expr.value, my_ast.Identifier) and not isinstance(expr.value.type, my_types.FunType):
-                    # if value is an Identifier for a non-function value, make a copy to avoid aliasing
-                    temp_var = visit(sym_table, expr.value)
-                    real_var = new_var()
-                    ins.append(my_ir.Copy(temp_var, real_var, loc=loc))
-                else:
-                    real_var = visit(sym_table, expr.value)
-                sym_table.add(expr.name, real_var)
-                return var_unit
-
-            case my_ast.UnaryOp():
-                visited_target = visit(sym_table, expr.target)
-                var_op = sym_table.lookup(expr.op)
-                if not var_op:
-                    raise Exception(f"{expr.op} not in SymTable")
-                var_result = new_var()
-                ins.append(my_ir.Call(
-                    var_op, [visited_target], var_result, loc=loc))
-                return var_result
-
-            case my_ast.BinaryOp():
-                if expr.op == "=":
-                    if not isinstance(expr.left, my_ast.Identifier):
-                        raise Exception(f"{expr.left} is not an identifier")
-
-                    var_left = visit(sym_table, expr.left)
-                    var_right = visit(sym_table, expr.right)
-                    ins.append(my_ir.Copy(var_right, var_left, loc=loc))
-                    if isinstance(expr.right.type, my_types.FunType):
-                        # if assigning a function to a variable, change the name in the table too to be able to call it properly
-                        sym_table.change(expr.left.name, var_right)
-                    return var_left
-
-                sc_or = new_label(loc=loc)
-                sc_and = new_label(loc=loc)
-                no_sc = new_label(loc=loc)
-                end = new_label(loc=loc)
-                var_result = new_var()
-                var_left = visit(sym_table, expr.left)
-
-                # short-circuit checks
-                if expr.op == "or":
-                    ins.append(my_ir.CondJump(var_left, sc_or, no_sc))
-                    ins.append(sc_or)
-                    ins.append(my_ir.LoadBoolConst(
-                        True, var_result, loc=loc))
-                    ins.append(my_ir.Jump(end, loc=loc))
-                    # jump here if no short-circuiting is done
-                    ins.append(no_sc)
-                elif expr.op == "and":
-                    ins.append(my_ir.CondJump(var_left, no_sc, sc_and))
-                    ins.append(sc_and)
-                    var = new_var()
-                    ins.append(my_ir.LoadBoolConst(
-                        False, var_result, loc=loc))
-                    ins.append(my_ir.Jump(end, loc=loc))
-                    # jump here if no short-circuiting is done
-                    ins.append(no_sc)
-
-                var_op = sym_table.lookup(expr.op)
-                if not var_op:
-                    raise Exception(f"{expr.op} not found in IR Table")
-
-                var_right = visit(sym_table, expr.right)
-                ins.append(my_ir.Call(
-                    var_op, [var_left, var_right], var_result, loc=loc))
-                if expr.op == "or" or expr.op == "and":
-                    ins.append(end)
-                return var_result
-
-            case my_ast.IfThen():
-                l_then = new_label(loc=loc)
-                l_end = new_label(loc=loc)
-
-                var_cond = visit(sym_table, expr.if_expr)
-
-                ins.append(my_ir.CondJump(var_cond, l_then, l_end, loc=loc))
-
-                ins.append(l_then)
-                visit(sym_table, expr.then_expr)
-
-                ins.append(l_end)
-                return var_unit
-
-            case my_ast.IfThenElse():
-                l_then = new_label(loc=loc)
-                l_else = new_label(loc=loc)
-                l_end = new_label(loc=loc)
-
-                var_result = new_var()
-
-                var_cond = visit(sym_table, expr.if_expr)
-                ins.append(my_ir.CondJump(var_cond, l_then, l_else, loc=loc))
-
-                ins.append(l_then)
-                then_result = visit(sym_table, expr.then_expr)
-                ins.append(my_ir.Copy(then_result, var_result))
-                ins.append(my_ir.Jump(l_end, loc=loc))
-
-                ins.append(l_else)
-                else_result = visit(sym_table, expr.else_expr)
-                ins.append(my_ir.Copy(else_result, var_result))
-
-                ins.append(l_end)
-                return var_result
-
-            case my_ast.WhileDo():
-                l_do = new_label(loc=loc)
-                l_end = new_label(loc=loc)
-
-                var_cond = visit(sym_table, expr.condition)
-                ins.append(my_ir.CondJump(var_cond, l_do, l_end))
-
-                ins.append(l_do)
-                visit(sym_table, expr.do_expr)
-                var_cond = visit(sym_table, expr.condition)
-                ins.append(my_ir.CondJump(var_cond, l_do, l_end))
-
-                ins.append(l_end)
-                return var_unit
-
-            case my_ast.TopLevel():
-                if len(expr.expressions) == 0:
-                    return var_unit
-                visited_toplevel_exprs: List[my_ir.IRVar] = []
-                for child_expr in expr.expressions:
-                    visited_toplevel_exprs.append(visit(sym_table, child_expr))
-
-                if expr.returns_last:
-                    return visited_toplevel_exprs[-1]
-                return var_unit
-
-            case my_ast.Block():
-                if len(expr.expressions) == 0:
-                    return var_unit
-                block_sym_table = SymTable[my_ir.IRVar](
-                    locals={}, parent=sym_table)
-
-                visited_block_exprs: List[my_ir.IRVar] = []
-                for child_expr in expr.expressions:
-                    visited_block_exprs.append(
-                        visit(block_sym_table, child_expr))
-
-                if expr.returns_last:
-                    return visited_block_exprs[-1]
-                return var_unit
-
-            case my_ast.FunctionCall():
-                func = sym_table.lookup(expr.name)
-                if func is None:
-                    raise Exception(
-                        f"Function '{expr.name}' not found in SymTable")
-
-                var_result = new_var()
-
-                visited_args = []
-                for arg in expr.args:
-                    visited_args.append(visit(sym_table, arg))
-
-                ins.append(my_ir.Call(func, visited_args, var_result))
-                return var_result
+        reserved_names = set(DEFAULT_LOCALS) | set(BINARY_OPS) | set(UNARY_OPS)
 
-            case _:
-                raise Exception("Expression not implemented")
+    ctx = _Ctx(ins=[], reserved_names=reserved_names,
+               var_unit=my_ir.IRVar('unit'))
 
-    root_sym_table = SymTable[my_ir.IRVar](locals={}, parent=None)
-    for name in reserved_names:
-        root_sym_table.add(name, my_ir.IRVar(name))
+    # built in one comprehension: no membership check and method call per
+    # name, and blocks see these through the parent chain instead of copies
+    root_sym_table = SymTable[my_ir.IRVar](
+        locals={name: my_ir.IRVar(name) for name in reserved_names},
+        parent=None)
 
     # Start visiting the AST from the root.
     # NOTE: Also typecheck the root here.
     typecheck(root_expr, None)
-    var_final_result = visit(root_sym_table, root_expr)
+    var_final_result = _visit(ctx, root_sym_table, root_expr)
 
     # Finally, add a Call that prints the result of the last instruction in the code, if the result was an Int or a Bool
 
     if root_expr.type == Int():
-        ins.append(my_ir.Call(my_ir.IRVar("print_int"),
-                   [var_final_result], new_var()))
+        ctx.ins.append(my_ir.Call(my_ir.IRVar("print_int"),
+                       [var_final_result], ctx.new_var()))
     elif root_expr.type == Bool():
-        ins.append(my_ir.Call(my_ir.IRVar("print_bool"),
-                   [var_final_result], new_var()))
-    return ins
+        ctx.ins.append(my_ir.Call(my_ir.IRVar("print_bool"),
+                       [var_final_result], ctx.new_var()))
+    return ctx.ins
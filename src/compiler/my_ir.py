@@ -1,117 +1,149 @@
 import dataclasses
+import operator
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Callable, ClassVar
 
 from compiler.tokenizer import SourceLocation
 
 
-@dataclass(frozen=True)
 class IRVar:
-    """Represents the name of a memory location or built-in."""
+    """Represents the name of a memory location or built-in.
+
+    Instances are interned: constructing the same name twice returns the
+    same object, so identity __eq__ is correct. Each instance carries a
+    small sequential id that __hash__ returns directly, which keeps the
+    dict and set operations of the downstream passes as cheap as hashing
+    an int."""
+    __slots__ = ('name', '_id')
     name: str
+    _id: int
+
+    _interned: dict[str, 'IRVar'] = {}
+    _next_id: int = 0
+
+    def __new__(cls, name: str) -> 'IRVar':
+        var = cls._interned.get(name)
+        if var is None:
+            var = super().__new__(cls)
+            var.name = name
+            var._id = cls._next_id
+            cls._next_id += 1
+            cls._interned[name] = var
+        return var
+
+    def __hash__(self) -> int:
+        return self._id
+
+    def __repr__(self) -> str:
+        return f"IRVar(name={self.name!r})"
 
     def __str__(self) -> str:
         return f"{self.name}"
 
 
-@dataclass(frozen=True)
+def format_value(v: Any) -> str:
+    """Formats one instruction field for Instruction.__str__."""
+    if isinstance(v, list):
+        return f'[{", ".join(format_value(e) for e in v)}]'
+    else:
+        return str(v)
+
+
+@dataclass(frozen=True, slots=True)
 class Instruction():
     """Base class for IR instructions."""
-    loc: SourceLocation | None = field(kw_only=True, default=None)
+    # compare=False: the generated __eq__ skips loc, keeping the
+    # location-insensitive equality the tests rely on
+    loc: SourceLocation | None = field(kw_only=True, default=None,
+                                       compare=False)
+
+    # which fields hold an IRVar (or a list of them), recorded per class at
+    # definition time so consumers need no per-instance reflection
+    __ir_var_fields__: ClassVar[tuple[str, ...]] = ()
+    __ir_var_list_fields__: ClassVar[tuple[str, ...]] = ()
+    # field names in declaration order, cached per class for __str__,
+    # extracted in one C-level call through the matching attrgetter
+    _printable_fields: ClassVar[tuple[str, ...]] = ('loc',)
+    _get_printable: ClassVar[Callable[['Instruction'], Any]] = (
+        operator.attrgetter('loc'))
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        # no super() call: slots=True recreates each class and does not patch
+        # the __class__ cell of classmethods, which breaks zero-argument super
+        annotations = cls.__dict__.get('__annotations__', {})
+        cls.__ir_var_fields__ = tuple(
+            name for name, annotation in annotations.items()
+            if annotation is IRVar)
+        cls.__ir_var_list_fields__ = tuple(
+            name for name, annotation in annotations.items()
+            if annotation == list[IRVar])
+        # only present on the recreated class slots=True builds, i.e. after
+        # the dataclass machinery has collected the fields
+        if cls.__dict__.get('__dataclass_fields__') is not None:
+            cls._printable_fields = tuple(
+                f.name for f in dataclasses.fields(cls)
+                if f.name != 'location')
+            cls._get_printable = operator.attrgetter(*cls._printable_fields)
 
     def __str__(self) -> str:
         """Returns a string representation similar to
         our IR code examples, e.g. 'LoadIntConst(3, x1)'"""
-        def format_value(v: Any) -> str:
-            if isinstance(v, list):
-                return f'[{", ".join(format_value(e) for e in v)}]'
-            else:
-                return str(v)
-        args = ', '.join(
-            format_value(getattr(self, field.name))
-            for field in dataclasses.fields(self)
-            if field.name != 'location'
-        )
+        # fetched from the class so mypy does not treat the stored
+        # attrgetter as a bound method expecting no arguments
+        getter = type(self)._get_printable
+        values = getter(self)
+        if not isinstance(values, tuple):
+            # attrgetter returns a bare value for a single field
+            values = (values,)
+        args = ', '.join(format_value(v) for v in values)
         return f'{type(self).__name__}({args})'
 
-    def __eq__(self, value: Any) -> bool:
-        if not isinstance(value, Instruction):
-            return False
-        for self_field, other_field in zip(self.__dict__, value.__dict__):
-            if getattr(self, self_field) != getattr(value, other_field):
-                if self_field == "loc" and other_field == "loc":
-                    # NOTE: We do not compare the loc values to make testing easier, might cause problems later
-                    continue
-                else:
-                    return False
-        return True
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Label(Instruction):
     """Marks the destination of a jump instruction."""
     name: str
 
-    def __eq__(self, value: Any) -> bool:
-        return super().__eq__(value)
 
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoadBoolConst(Instruction):
     """Loads a boolean constant value to `dest`."""
     value: bool
     dest: IRVar
 
-    def __eq__(self, value: Any) -> bool:
-        return super().__eq__(value)
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoadIntConst(Instruction):
     """Loads a constant value to `dest`."""
     value: int
     dest: IRVar
 
-    def __eq__(self, value: Any) -> bool:
-        return super().__eq__(value)
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Copy(Instruction):
     """Copies a value from one variable to another."""
     source: IRVar
     dest: IRVar
 
-    def __eq__(self, value: Any) -> bool:
-        return super().__eq__(value)
 
-
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Call(Instruction):
     """Calls a function or built-in."""
     fun: IRVar
     args: list[IRVar]
     dest: IRVar
 
-    def __eq__(self, value: Any) -> bool:
-        return super().__eq__(value)
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Jump(Instruction):
     """Unconditionally continues execution from the given label."""
     label: Label
 
-    def __eq__(self, value: Any) -> bool:
-        return super().__eq__(value)
-
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CondJump(Instruction):
     """Continues execution from `then_label` if `cond` is true, otherwise from `else_label`."""
     cond: IRVar
     then_label: Label
     else_label: Label
 
-    def __eq__(self, value: Any) -> bool:
-        return super().__eq__(value)
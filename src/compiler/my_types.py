@@ -1,42 +1,86 @@
 from dataclasses import dataclass
-from typing import Any, Tuple
+from typing import ClassVar, Dict, Tuple
 
 type BasicType = Int | Bool | Unit
 type Type = Int | Bool | Unit | FunType
 
 
 class Int:
+    """The basic types are singletons: every Int() call returns the same
+    instance, so the default identity __eq__ and __hash__ are correct and
+    comparisons cost a single pointer check."""
+    __slots__ = ()
+    _instance: 'Int | None' = None
 
-    def __eq__(self, value: Any) -> bool:
-        return self.__class__ == value.__class__
+    def __new__(cls) -> 'Int':
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __repr__(self) -> str:
         return "Int"
 
 
 class Bool:
+    __slots__ = ()
+    _instance: 'Bool | None' = None
 
-    def __eq__(self, value: Any) -> bool:
-        return self.__class__ == value.__class__
+    def __new__(cls) -> 'Bool':
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __repr__(self) -> str:
         return "Bool"
 
 
 class Unit:
+    __slots__ = ()
+    _instance: 'Unit | None' = None
 
-    def __eq__(self, value: Any) -> bool:
-        return self.__class__ == value.__class__
+    def __new__(cls) -> 'Unit':
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __repr__(self) -> str:
         return "Unit"
 
 
-@dataclass(init=False)
+# the shared instances, for call sites that prefer 'is INT' over '== Int()'
+INT = Int()
+BOOL = Bool()
+UNIT = Unit()
+
+
+@dataclass(init=False, eq=False, slots=True)
 class FunType:
+    """Function signatures, interned by (type_args, return_type) like the
+    basic type singletons above: equal signatures share one instance, so
+    the default identity __eq__ and __hash__ are correct and comparisons
+    cost a single pointer check."""
     type_args: Tuple[Type, ...]
     return_type: Type
 
+    _interned: ClassVar[Dict[Tuple[Tuple[Type, ...], Type], 'FunType']] = {}
+
+    def __new__(cls, *type_args: Type, return_type: Type) -> 'FunType':
+        key = (type_args, return_type)
+        fun = cls._interned.get(key)
+        if fun is None:
+            # object.__new__ instead of super(): slots=True recreates the
+            # class, which breaks zero-argument super in its methods
+            fun = object.__new__(cls)
+            cls._interned[key] = fun
+        return fun
+
     def __init__(self, *type_args: Type, return_type: Type):
         self.type_args = type_args
         self.return_type = return_type
+
+    def __getnewargs_ex__(self) -> Tuple[Tuple[Type, ...], Dict[str, Type]]:
+        # pickle reconstructs via __new__; handing it the real arguments
+        # (instead of the default no-argument call, which __new__ rejects)
+        # routes unpickling through the interning table, so types loaded
+        # from the AST disk cache still compare by identity
+        return (tuple(self.type_args), {'return_type': self.return_type})
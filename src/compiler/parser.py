@@ -1,61 +1,72 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
 from typing import List
 
 from compiler import my_ast, my_types
-from compiler.tokenizer import SourceLocation, Token, TokenType
-
-left_associative_binary_operators: List[List[str]] = [
-    ['or'],
-    ['and'],
-    ['==', '!='],
-    ['<', '<=', '>', '>='],
-    ['+', '-'],
-    ['*', '/', '%'],
-    # all identifiers are in this spot
-    # unary_-, unary_not and '=' are special cases
-]
-
-
-def parse(tokens: list[Token]) -> my_ast.Expression:
-    """Returns an Expression parsed from a list of tokens, or None if the list is empty."""
-    if len(tokens) == 0:
-        return my_ast.EmptyExpression()
-
-    pos = 0
-    # saves the last consumed Token, used when parsing blocks and semicolons.
-    last_consumed: Token = Token("", TokenType.BEGIN, SourceLocation(-1, -1))
-
-    def peek() -> Token:
-        """Returns the next Token on the token list, or the last Token on the list with type=END if there are no more tokens."""
-        if pos < len(tokens):
-            return tokens[pos]
-        else:
-            return Token(
-                source_loc=tokens[-1].source_loc,
-                type=TokenType.END,
-                text="",
-            )
-
-    def consume(expected: str | list[str] | None = None) -> Token:
+from compiler.tokenizer import SourceLocation, Token, TokenType, tokenize
+
+# binary operator precedence, higher binds tighter; "=" is the only
+# right-associative operator
+binary_operator_precedence: dict[str, int] = {
+    "=": 1,
+    "or": 2,
+    "and": 3,
+    "==": 4, "!=": 4,
+    "<": 5, "<=": 5, ">": 5, ">=": 5,
+    "+": 6, "-": 6,
+    "*": 7, "/": 7, "%": 7,
+    # unary_- and unary_not are special cases
+}
+
+# frozensets: membership is one hash probe, and nothing is rebuilt per check
+_UNARY_OP_TOKENS = frozenset(("not", "-"))
+_TYPE_TOKENS = frozenset(("Int", "Bool", "Unit"))
+
+
+class Parser:
+    """Parses a token list into an AST.
+
+    The tokens are held in an indexed list ending in a single END sentinel,
+    so peek() is one list index with no bounds branch, and expressions are
+    parsed with precedence climbing over binary_operator_precedence instead
+    of one recursion level per precedence tier."""
+
+    __slots__ = ('tokens', 'pos', 'last_consumed')
+
+    def __init__(self, tokens: list[Token]) -> None:
+        self.tokens = [*tokens, Token("", TokenType.END,
+                                      tokens[-1].source_loc)]
+        self.pos = 0
+        # saves the last consumed Token, used when parsing blocks and semicolons.
+        self.last_consumed: Token = Token(
+            "", TokenType.BEGIN, SourceLocation(-1, -1))
+
+    def peek(self) -> Token:
+        """Returns the next Token on the token list; the END sentinel if there are no more tokens."""
+        return self.tokens[self.pos]
+
+    def consume(self, expected: str | frozenset[str] | list[str] | None = None) -> Token:
         """Same as peek(), but also moves to the next Token on the list (= increases pos by 1).
-        If <expected> is given, the next token has to match the given string/list, otherwise this will throw an error."""
-        nonlocal pos
-        nonlocal last_consumed
-        token = peek()
+        If <expected> is given, the next token has to match the given string/collection, otherwise this will throw an error."""
+        token = self.tokens[self.pos]
         if isinstance(expected, str) and token.text != expected:
             raise Exception(
                 f'{token.source_loc}: expected "{expected}", but got "{token.text}"')
-        if isinstance(expected, list) and token.text not in expected:
+        if isinstance(expected, (list, frozenset)) and token.text not in expected:
             comma_separated = ", ".join([f'"{e}"' for e in expected])
             raise Exception(
                 f'{token.source_loc}: expected one of: {comma_separated}')
-        pos += 1
-        last_consumed = token
+        self.pos += 1
+        self.last_consumed = token
         return token
 
-    def parse_type() -> my_types.BasicType:
+    def parse_type(self) -> my_types.BasicType:
         """Parses a variable's type, if a type hint was given."""
         type: my_types.BasicType | None = None
-        match peek().text:
+        token = self.peek()
+        match token.text:
             case "Int":
                 type = my_types.Int()
             case "Bool":
@@ -64,126 +75,97 @@ def parse(tokens: list[Token]) -> my_ast.Expression:
                 type = my_types.Unit()
             case _:
                 raise Exception(
-                    f"{peek().source_loc}: Expected Int, Bool or Unit as type, but got {peek().text}")
+                    f"{token.source_loc}: Expected Int, Bool or Unit as type, but got {token.text}")
         # consume the type token
-        consume(["Int", "Bool", "Unit"])
+        self.consume(_TYPE_TOKENS)
         return type
 
-    def parse_expression(allow_vars: bool = False) -> my_ast.Expression:
-        level_index = 0
-        left = parse_term(0, allow_vars=allow_vars)
-        for precedence_level in left_associative_binary_operators[level_index:]:
-            if peek().text == "=":
-                operator = consume("=").text
-                right = parse_expression()
-                return my_ast.BinaryOp(left, operator, right, source_loc=left.source_loc)
-            while peek().text in precedence_level:
-                operator = consume().text
-                new_level_index = left_associative_binary_operators.index(
-                    precedence_level)
-                right = parse_term(new_level_index)
-                left = my_ast.BinaryOp(
-                    left,
-                    operator,
-                    right,
-                    source_loc=left.source_loc
-                )
-        return left
-
-    def parse_term(level_index: int, *, allow_vars: bool = False) -> my_ast.Expression:
-        left = parse_factor(allow_vars=allow_vars)
-        for precedence_level in left_associative_binary_operators[level_index + 1:]:
-            if peek().text == "=":
-                operator = consume("=").text
-                right = parse_expression()
-                return my_ast.BinaryOp(left, operator, right, source_loc=left.source_loc)
-            while peek().text in precedence_level:
-                operator = consume().text
-                new_level_index = left_associative_binary_operators.index(
-                    precedence_level)
-                right = parse_term(new_level_index)
-                left = my_ast.BinaryOp(
-                    left,
-                    operator,
-                    right,
-                    source_loc=left.source_loc
-                )
-        return left
-
-    def parse_factor(allow_vars: bool = False) -> my_ast.Expression:
-        if peek().text == '(':
-            return parse_parenthesized()
-        elif peek().text == "{":
-            return parse_block()
-        elif peek().text == "if":
-            return parse_conditional()
-        elif peek().text in ["not", "-"]:
-            return parse_unary()
-
-        elif peek().text == "while":
-            return parse_while_do()
-        elif allow_vars and peek().text == "var":
-            return parse_variable_declaration()
-
-        if peek().type == TokenType.LITERAL:
-            return parse_literal()
-        elif peek().type == TokenType.IDENTIFIER:
-            return parse_identifier()
-        else:
-            raise Exception(
-                f'{peek().source_loc}: expected an integer literal or an identifier, but got "{peek().text}"')
+    def parse_expression(self, allow_vars: bool = False) -> my_ast.Expression:
+        left = self.parse_factor(allow_vars=allow_vars)
+        return self.parse_binop(left, 1)
+
+    def parse_binop(self, left: my_ast.Expression, min_prec: int) -> my_ast.Expression:
+        """Extends <left> with binary operators that bind at least as tightly as <min_prec>."""
+        precedence = binary_operator_precedence
+        while True:
+            operator = self.peek().text
+            prec = precedence.get(operator, 0)
+            if prec < min_prec:
+                return left
+            self.consume()
+            right = self.parse_factor()
+            # "=" is right-associative: climb again from the same level so
+            # "a = b = c" groups as "a = (b = c)"
+            right = self.parse_binop(
+                right, prec if operator == "=" else prec + 1)
+            left = my_ast.BinaryOp(
+                left, operator, right, source_loc=left.source_loc)
+
+    def parse_factor(self, allow_vars: bool = False) -> my_ast.Expression:
+        # bind the token once, then dispatch through the handler tables
+        # below the class: one dict probe instead of an if/elif ladder
+        token = self.peek()
+        handler = _FACTOR_TEXT_HANDLERS.get(token.text)
+        if handler is None:
+            if allow_vars and token.text == "var":
+                return self.parse_variable_declaration()
+            handler = _FACTOR_TYPE_HANDLERS.get(token.type)
+            if handler is None:
+                raise Exception(
+                    f'{token.source_loc}: expected an integer literal or an identifier, but got "{token.text}"')
+        return handler(self)
 
-    def parse_parenthesized() -> my_ast.Expression:
+    def parse_parenthesized(self) -> my_ast.Expression:
         """Called when parse_factor() sees that an opening parenthesis is the next token."""
-        consume('(')
-        expr = parse_expression()
-        consume(')')
+        self.consume('(')
+        expr = self.parse_expression()
+        self.consume(')')
         return expr
 
-    def parse_block() -> my_ast.Block:
-        block_start_token = consume("{")
+    def parse_block(self) -> my_ast.Block:
+        block_start_token = self.consume("{")
         expressions = []
         returns_last = False
 
-        while peek().text != "}":
-            expression = parse_expression(True)
+        while self.peek().text != "}":
+            expression = self.parse_expression(True)
             expressions.append(expression)
 
-            if peek().text != ";":
-                if (last_consumed.text == "}") and peek().text != "}":
+            if self.peek().text != ";":
+                if (self.last_consumed.text == "}") and self.peek().text != "}":
                     # NOTE: might cause issues later??
                     continue
 
                 # this expression is returned from the block
                 returns_last = True
                 break
-            consume(";")
+            self.consume(";")
 
-        consume("}")
+        self.consume("}")
         return my_ast.Block(*expressions, returns_last=returns_last, source_loc=block_start_token.source_loc)
 
-    def parse_top_level() -> my_ast.Expression | my_ast.TopLevel:
+    def parse_top_level(self) -> my_ast.Expression | my_ast.TopLevel:
         """Will return either a single Expresison (if there is only one top level expression), or a TopLevel otherwise."""
         expressions: list[my_ast.Expression] = []
-        expressions.append(parse_expression(True))
+        expressions.append(self.parse_expression(True))
         returns_last = True
 
-        while peek().text == ";" or last_consumed.text == "}":
-            if peek().text == ";":
-                consume(";")
-                if peek().type != TokenType.END:
-                    expressions.append(parse_expression(True))
-            elif last_consumed.text == "}":
-                if peek().text == ";" or peek().type == TokenType.END:
+        while self.peek().text == ";" or self.last_consumed.text == "}":
+            if self.peek().text == ";":
+                self.consume(";")
+                if self.peek().type != TokenType.END:
+                    expressions.append(self.parse_expression(True))
+            elif self.last_consumed.text == "}":
+                if self.peek().text == ";" or self.peek().type == TokenType.END:
                     break
                 else:
-                    expressions.append(parse_expression(True))
+                    expressions.append(self.parse_expression(True))
 
-        if peek().type != TokenType.END:
+        if self.peek().type != TokenType.END:
             raise Exception(
-                f'{peek().source_loc}: invalid token "{peek().text}"')
+                f'{self.peek().source_loc}: invalid token "{self.peek().text}"')
 
-        if last_consumed.text == ";":
+        if self.last_consumed.text == ";":
             returns_last = False
 
         # if there is only a single expression that IS NOT FOLLOWED BY A SEMICOLON, only return the expression, else return a TopLevel
@@ -191,111 +173,179 @@ def parse(tokens: list[Token]) -> my_ast.Expression:
             return expressions[0]
         return my_ast.TopLevel(*expressions, returns_last=returns_last, source_loc=expressions[0].source_loc)
 
-    def parse_conditional() -> my_ast.IfThenElse | my_ast.IfThen:
-        if_token = consume("if")
-        if_expr = parse_expression()
-        consume("then")
-        then_expr = parse_expression()
-        if peek().text == "else":
-            consume("else")
-            else_expr = parse_expression()
+    def parse_conditional(self) -> my_ast.IfThenElse | my_ast.IfThen:
+        if_token = self.consume("if")
+        if_expr = self.parse_expression()
+        self.consume("then")
+        then_expr = self.parse_expression()
+        if self.peek().text == "else":
+            self.consume("else")
+            else_expr = self.parse_expression()
             return my_ast.IfThenElse(if_expr, then_expr, else_expr, source_loc=if_token.source_loc)
         return my_ast.IfThen(if_expr, then_expr, source_loc=if_token.source_loc)
 
-    def parse_function(name: str, source_loc: SourceLocation) -> my_ast.FunctionCall:
-        consume("(")
+    def parse_function(self, name: str, source_loc: SourceLocation) -> my_ast.FunctionCall:
+        self.consume("(")
 
         expr_params: List[my_ast.Expression] = []
-        if peek().text != ")":
-            first_param = parse_expression()
+        if self.peek().text != ")":
+            first_param = self.parse_expression()
             expr_params.append(first_param)
-            while peek().text == ",":
-                consume(",")
-                param = parse_expression()
+            while self.peek().text == ",":
+                self.consume(",")
+                param = self.parse_expression()
                 expr_params.append(param)
 
-        consume(")")
-        return my_ast.FunctionCall(name, *tuple(expr_params), source_loc=source_loc)
+        self.consume(")")
+        return my_ast.FunctionCall(name, *expr_params, source_loc=source_loc)
 
-    def parse_unary() -> my_ast.UnaryOp:
-        if peek().text == "not":
-            op_token = consume("not")
-        elif peek().text == "-":
-            op_token = consume("-")
+    def parse_unary(self) -> my_ast.UnaryOp:
+        token = self.peek()
+        if token.text in _UNARY_OP_TOKENS:
+            op_token = self.consume(token.text)
         else:
             raise Exception(
-                f'{peek().source_loc}: expected "not" or "-", but got "{peek().text}"')
+                f'{token.source_loc}: expected "not" or "-", but got "{token.text}"')
 
-        target = parse_factor()
+        target = self.parse_factor()
         return my_ast.UnaryOp(f"unary_{op_token.text}", target, source_loc=op_token.source_loc)
 
-    def parse_variable_declaration() -> my_ast.Variable:
-        var_token = consume("var")
+    def parse_variable_declaration(self) -> my_ast.Variable:
+        var_token = self.consume("var")
         var_type: my_types.Type | None = None
 
-        if peek().type != TokenType.IDENTIFIER:
+        name_token = self.peek()
+        if name_token.type != TokenType.IDENTIFIER:
             raise Exception(
-                f'{peek().source_loc}: expected the name of the variable, but got "{peek().text}"')
+                f'{name_token.source_loc}: expected the name of the variable, but got "{name_token.text}"')
 
-        parsed = parse_identifier()
+        parsed = self.parse_identifier()
         name = parsed.name
 
-        if peek().text == ":":
+        if self.peek().text == ":":
             # found typing information
-            consume(":")
-            if peek().text == "(":
+            self.consume(":")
+            if self.peek().text == "(":
                 # found function typing information
-                consume("(")
+                self.consume("(")
                 param_types = []
-                if peek().text != ")":
-                    first_type = parse_type()
+                if self.peek().text != ")":
+                    first_type = self.parse_type()
                     param_types.append(first_type)
-                    while peek().text == ",":
-                        consume(",")
-                        param_type = parse_type()
+                    while self.peek().text == ",":
+                        self.consume(",")
+                        param_type = self.parse_type()
                         param_types.append(param_type)
-                consume(")")
-                consume("=>")  # might not work due to =
-                return_type = parse_type()
+                self.consume(")")
+                self.consume("=>")  # might not work due to =
+                return_type = self.parse_type()
                 var_type = my_types.FunType(
                     *param_types, return_type=return_type)
             else:
-                var_type = parse_type()
+                var_type = self.parse_type()
 
-        consume("=")
-        value = parse_expression()
+        self.consume("=")
+        value = self.parse_expression()
 
         if var_type:
             return my_ast.Variable(name, value, type=var_type, source_loc=var_token.source_loc)
         return my_ast.Variable(name, value, source_loc=var_token.source_loc)
 
-    def parse_while_do() -> my_ast.WhileDo:
-        while_token = consume("while")
-        condition = parse_expression()
-        consume("do")
-        do_expr = parse_expression()
+    def parse_while_do(self) -> my_ast.WhileDo:
+        while_token = self.consume("while")
+        condition = self.parse_expression()
+        self.consume("do")
+        do_expr = self.parse_expression()
         return my_ast.WhileDo(condition, do_expr, source_loc=while_token.source_loc)
 
-    def parse_literal() -> my_ast.Literal:
-        if peek().type != TokenType.LITERAL:
+    def parse_literal(self) -> my_ast.Literal:
+        token = self.peek()
+        if token.type != TokenType.LITERAL:
             raise Exception(
-                f'{peek().source_loc}: expected a literal')
-        token = consume()
+                f'{token.source_loc}: expected a literal')
+        token = self.consume()
         if token.text == "true":
             return my_ast.Literal(True, source_loc=token.source_loc)
         elif token.text == "false":
             return my_ast.Literal(False, source_loc=token.source_loc)
         return my_ast.Literal(int(token.text), source_loc=token.source_loc)
 
-    def parse_identifier() -> my_ast.Identifier | my_ast.FunctionCall:
-        if peek().type != TokenType.IDENTIFIER:
+    def parse_identifier(self) -> my_ast.Identifier | my_ast.FunctionCall:
+        token = self.peek()
+        if token.type != TokenType.IDENTIFIER:
             raise Exception(
-                f'{peek().source_loc}: expected an identifier, but got "{peek().text}"')
-        token = consume()
+                f'{token.source_loc}: expected an identifier, but got "{token.text}"')
+        token = self.consume()
         # check if this is the start of a function call
-        if peek().text == "(":
-            return parse_function(token.text, token.source_loc)
+        if self.peek().text == "(":
+            return self.parse_function(token.text, token.source_loc)
         return my_ast.Identifier(token.text, source_loc=token.source_loc)
 
-    output = parse_top_level()
-    return output
+
+def parse(tokens: list[Token]) -> my_ast.Expression:
+    """Returns an Expression parsed from a list of tokens, or an EmptyExpression if the list is empty."""
+    if len(tokens) == 0:
+        return my_ast.EmptyExpression()
+    return Parser(tokens).parse_top_level()
+
+
+# bump whenever the grammar or the my_ast node layout changes, so stale
+# pickled trees are never loaded
+_PARSER_VERSION = "1"
+_AST_CACHE_DIR = Path.home() / ".cache" / "compiler-project" / "ast"
+_ast_cache: dict[str, my_ast.Expression] = {}
+
+
+def parse_cached(source_code: str) -> my_ast.Expression:
+    """Like parse(tokenize(source_code)), but keyed by the SHA-256 of the
+    source: hits skip the whole front end. Trees are kept in memory for
+    this process and pickled to the user cache directory, which also
+    serves the forked per-request workers of the serve mode. Cache-dir
+    problems fall back silently to a plain parse."""
+    key = hashlib.sha256(
+        (_PARSER_VERSION + source_code).encode()).hexdigest()
+    tree = _ast_cache.get(key)
+    if tree is None:
+        path = _AST_CACHE_DIR / f"{key}.pkl"
+        try:
+            with open(path, 'rb') as file:
+                tree = pickle.load(file)
+        except Exception:
+            # missing, unreadable or corrupt (e.g. truncated) entry: drop
+            # it so it cannot fail every later compile of this source, and
+            # fall back to a plain parse
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            tree = parse(tokenize(source_code))
+            try:
+                _AST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                # write to a private file and move it into place: os.replace
+                # is atomic, so the forked serve-mode workers can never read
+                # a half-written entry
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, 'wb') as file:
+                    pickle.dump(tree, file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
+        _ast_cache[key] = tree
+    return tree
+
+
+# parse_factor dispatch tables, built once: keyword/punctuation factors are
+# selected by token text, the rest by token type
+_FACTOR_TEXT_HANDLERS = {
+    '(': Parser.parse_parenthesized,
+    '{': Parser.parse_block,
+    'if': Parser.parse_conditional,
+    'not': Parser.parse_unary,
+    '-': Parser.parse_unary,
+    'while': Parser.parse_while_do,
+}
+
+_FACTOR_TYPE_HANDLERS = {
+    TokenType.LITERAL: Parser.parse_literal,
+    TokenType.IDENTIFIER: Parser.parse_identifier,
+}
@@ -1,4 +1,5 @@
 import re
+import sys
 from dataclasses import dataclass
 from enum import Enum
 
@@ -13,7 +14,7 @@ class TokenType(Enum):
     END = "end"
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceLocation:
     line: int = -1
     column: int = -1
@@ -26,7 +27,7 @@ class SourceLocation:
         return f"loc=({self.line}, {self.column})"
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     """Class for a single Token.
     Contains the text of the token, the type of the token,
@@ -46,84 +47,111 @@ class Token:
         return f"Token text={self.text} type={self.type}"
 
 
-def tokenize(source_code: str) -> list[Token]:
-    literal_patterns = [
-        re.compile(r"[0-9]+"),
-        re.compile(r"false|true")
-    ]
-
-    identifier_patterns = [
-        re.compile(r"[_a-zA-Z][_a-zA-Z0-9]*")  # also includes if, while etc.
-    ]
-
-    # these are ignored atm
-    other_patterns = [
-        re.compile(r"\s+"),
-        re.compile(r"\n"),
-        re.compile(r"#.*"),  # Comments
-        re.compile(r"//.*")  # Comments
-    ]
-
-    # (, ), {, }, ,, ;
-    punctuation_patterns = [
-        re.compile(r"\(|\)|\{|\}|\,|\;|:|=>")
-    ]
-    # +, -, *, /, %, =, ==, !=, <, <=, >, >=
-    operator_patterns = [
-        re.compile(r"==|!=|<=|>=|\<|\>|\+|\-|\*|\/|\%|\=")
-    ]
-
-    def look_for_matches(source_code: str) -> Token | None:
-        for literal_pattern in literal_patterns:
-            match = re.match(literal_pattern, source_code)
-            if match:
-                return Token(match.group(
-                ), TokenType.LITERAL, SourceLocation(line, column))
-        for identifier_pattern in identifier_patterns:
-            match = re.match(identifier_pattern, source_code)
-            if match:
-                return Token(match.group(
-                ), TokenType.IDENTIFIER, SourceLocation(line, column))
-        # this is before the operator loop because of =>
-        for punctuation_pattern in punctuation_patterns:
-            match = re.match(punctuation_pattern, source_code)
-            if match:
-                return Token(match.group(
-                ), TokenType.PUNCTUATION, SourceLocation(line, column))
-         # this is before the operator loop because of //
-        for other_pattern in other_patterns:
-            match = re.match(other_pattern, source_code)
-            if match:
-                return Token(match.group(
-                ), TokenType.OTHER, SourceLocation(line, column))
-        for operator_pattern in operator_patterns:
-            match = re.match(operator_pattern, source_code)
-            if match:
-                return Token(match.group(
-                ), TokenType.OPERATOR, SourceLocation(line, column))
-
-        return None
+# locations interned per (line, column): sources are tokenized many times
+# over (tests, the compile server), and the same positions recur constantly,
+# so tokens and AST nodes share one SourceLocation object per position
+_LOC_CACHE: dict[tuple[int, int], SourceLocation] = {}
 
-    line = 1
-    column = 1
-    output = []
-    match_token = look_for_matches(source_code)
 
-    while match_token:
-        if re.match(r"\n", match_token.text):
-            line += 1
-            column = 1
-        else:
-            column += len(match_token.text)
+def _source_location(line: int, column: int) -> SourceLocation:
+    key = (line, column)
+    loc = _LOC_CACHE.get(key)
+    if loc is None:
+        loc = SourceLocation(line, column)
+        _LOC_CACHE[key] = loc
+    return loc
 
-        if not match_token.type == TokenType.OTHER:
-            # Do not add OTHER type tokens to the output
-            output.append(match_token)
 
-        if len(match_token.text) < len(source_code):
-            source_code = source_code[len(match_token.text):]
-            match_token = look_for_matches(source_code)
-        else:
-            break
+# the shared wildcard location: tokens and AST nodes built for comparison
+# purposes (mainly in tests) can reference this one instance instead of
+# allocating a fresh any=True location apiece
+ANY_LOCATION = SourceLocation(any=True)
+
+
+# one alternation regex, tried in the same order as the old per-category
+# pattern lists (literals before identifiers, punctuation before operators
+# so "=>" wins over "=", comments before "/"); whitespace and comments get
+# their own group so they can be skipped without a second pass
+_TOKEN_REGEX = re.compile(
+    r"(?P<literal>[0-9]+|false|true)"
+    r"|(?P<identifier>[_a-zA-Z][_a-zA-Z0-9]*)"
+    r"|(?P<punctuation>[(){},;:]|=>)"
+    r"|(?P<other>\s+|#.*|//.*)"
+    r"|(?P<operator>==|!=|<=|>=|[<>+\-*/%=])"
+)
+
+_GROUP_TOKEN_TYPES = {
+    "literal": TokenType.LITERAL,
+    "identifier": TokenType.IDENTIFIER,
+    "punctuation": TokenType.PUNCTUATION,
+    "operator": TokenType.OPERATOR,
+}
 
+# single characters that are a complete token (or skippable) on their own,
+# handled without entering the regex engine at all; none of these can start
+# a longer token
+_SINGLE_CHAR_PUNCT = {ch: sys.intern(ch) for ch in "(){},;:"}
+
+# the two-character operators, also emitted without the regex engine; a
+# lone "=" stays with the regex since it may start the "=>" punctuation
+_TWO_CHAR_OPS = {op: sys.intern(op) for op in ("==", "!=", "<=", ">=")}
+
+
+def tokenize(source_code: str) -> list[Token]:
+    """Returns the Tokens of <source_code> in one linear scan.
+
+    Spaces, newlines and single-character punctuation take a fast path;
+    everything else is matched at the cursor by the master regex, which
+    replaces the old try-every-pattern loop that re-sliced the remaining
+    source after every match."""
+    output: list[Token] = []
+    append = output.append
+    line = 1
+    line_start = 0  # offset of the first character of the current line
+    pos = 0
+    end = len(source_code)
+    match_at = _TOKEN_REGEX.match
+    while pos < end:
+        ch = source_code[pos]
+        if ch == ' ':
+            pos += 1
+            continue
+        if ch == '\n':
+            pos += 1
+            line += 1
+            line_start = pos
+            continue
+        text = _SINGLE_CHAR_PUNCT.get(ch)
+        if text is not None:
+            append(Token(text, TokenType.PUNCTUATION,
+                         _source_location(line, pos - line_start + 1)))
+            pos += 1
+            continue
+        if ch in '=!<>':
+            text = _TWO_CHAR_OPS.get(source_code[pos:pos + 2])
+            if text is not None:
+                append(Token(text, TokenType.OPERATOR,
+                             _source_location(line, pos - line_start + 1)))
+                pos += 2
+                continue
+        match = match_at(source_code, pos)
+        if match is None:
+            # unrecognized character: stop here, like the old loop did
+            # when none of its patterns matched
+            break
+        group = match.lastgroup
+        # every alternative in _TOKEN_REGEX is a named group, so a match
+        # always has one; the assert narrows group to str for mypy
+        assert group is not None
+        text = match.group()
+        if group == "other":
+            # remaining whitespace or a comment: track line breaks
+            newlines = text.count("\n")
+            if newlines:
+                line += newlines
+                line_start = match.start() + text.rfind("\n") + 1
+        else:
+            append(Token(sys.intern(text), _GROUP_TOKEN_TYPES[group],
+                         _source_location(line, pos - line_start + 1)))
+        pos = match.end()
     return output
@@ -1,12 +1,44 @@
 from dataclasses import dataclass
-from types import NoneType
-from typing import Dict, List, Self
+from typing import Callable, Dict, Self
 
 from compiler import my_ast
-from compiler.my_types import Bool, FunType, Int, Type, Unit
+from compiler.my_types import BOOL, INT, UNIT, Bool, FunType, Int, Type, Unit
 
 
-@dataclass(init=False)
+# the builtin signatures, built once: every root TypeTable starts from a
+# copy of this instead of re-allocating the same 16 FunTypes per scope
+_BUILTIN_LOCALS: Dict[str, Type] = {
+    "+": FunType(INT, INT, return_type=INT),
+    '-': FunType(INT, INT, return_type=INT),
+    "unary_-": FunType(INT, return_type=INT),
+    "*": FunType(INT, INT, return_type=INT),
+    "/": FunType(INT, INT, return_type=INT),
+    "%": FunType(INT, INT, return_type=INT),
+    "<": FunType(INT, INT, return_type=BOOL),
+    "<=": FunType(INT, INT, return_type=BOOL),
+    ">": FunType(INT, INT, return_type=BOOL),
+    ">=": FunType(INT, INT, return_type=BOOL),
+    "or": FunType(BOOL, BOOL, return_type=BOOL),
+    "and": FunType(BOOL, BOOL, return_type=BOOL),
+    "unary_not": FunType(BOOL, return_type=BOOL),
+    "print_int": FunType(INT, return_type=UNIT),
+    "print_bool": FunType(BOOL, return_type=UNIT),
+    "read_int": FunType(return_type=INT)
+    # "==" and "!=" are a special case inside the BinaryOp() match block
+}
+
+
+# the binary operator signatures from _BUILTIN_LOCALS, pre-unpacked into
+# (arg1, arg2, return) tuples so the BinaryOp handler needs one dict probe
+# and two identity compares per node
+_BINOP_SIGS: Dict[str, tuple[Type, Type, Type]] = {
+    op: (fun.type_args[0], fun.type_args[1], fun.return_type)
+    for op, fun in _BUILTIN_LOCALS.items()
+    if isinstance(fun, FunType) and len(fun.type_args) == 2
+}
+
+
+@dataclass(init=False, slots=True)
 class TypeTable:
     """Like SymTable, but maps variable names to types"""
     locals: Dict[str, Type]
@@ -15,30 +47,15 @@ class TypeTable:
     def __init__(self, locals: Dict[str, Type] | None = None, parent: Self | None = None) -> None:
         if locals:
             self.locals = locals
+        elif parent is None:
+            # root scope: a copy, so user declarations don't leak into
+            # the shared builtin dict
+            self.locals = dict(_BUILTIN_LOCALS)
         else:
-            self.locals = {
-                "+": FunType(Int(), Int(), return_type=Int()),
-                '-': FunType(Int(), Int(), return_type=Int()),
-                "unary_-": FunType(Int(), return_type=Int()),
-                "*": FunType(Int(), Int(), return_type=Int()),
-                "/": FunType(Int(), Int(), return_type=Int()),
-                "%": FunType(Int(), Int(), return_type=Int()),
-                "<": FunType(Int(), Int(), return_type=Bool()),
-                "<=": FunType(Int(), Int(), return_type=Bool()),
-                ">": FunType(Int(), Int(), return_type=Bool()),
-                ">=": FunType(Int(), Int(), return_type=Bool()),
-                "or": FunType(Bool(), Bool(), return_type=Bool()),
-                "and": FunType(Bool(), Bool(), return_type=Bool()),
-                "unary_not": FunType(Bool(), return_type=Bool()),
-                "print_int": FunType(Int(), return_type=Unit()),
-                "print_bool": FunType(Bool(), return_type=Unit()),
-                "read_int": FunType(return_type=Int())
-                # "==" and "!=" are a special case inside the BinaryOp() match block
-            }
-        if parent:
-            self.parent = parent
-        else:
-            self.parent = None
+            # child scope: starts empty, builtins resolve via the parent
+            # chain instead of being copied into every nested scope
+            self.locals = {}
+        self.parent = parent
 
     def add(self, name: str, value: Type) -> None:
         if name in self.locals:
@@ -47,154 +64,203 @@ class TypeTable:
         return None
 
     def lookup(self, name: str) -> Type | None:
-        if name in self.locals:
-            return self.locals.get(name)
-        elif self.parent:
-            return self.parent.lookup(name)
+        # an iterative walk up the scope chain, like SymTable.lookup: no
+        # call frame per scope level, and one dict probe per scope
+        table: TypeTable | None = self
+        while table is not None:
+            value = table.locals.get(name)
+            if value is not None:
+                return value
+            table = table.parent
         return None
 
 
-def typecheck(node: my_ast.Expression | None, type_table: TypeTable | None = None) -> Type:
-    """Uses get_type() to get the type of the node, then sets node.type to that type and returns the type.
-    Used to recursively set the type information for each node inside a root expression."""
+def _type_empty_expression(node: my_ast.EmptyExpression, type_table: TypeTable) -> Type:
+    return UNIT
 
-    def get_type(node: my_ast.Expression, type_table: TypeTable) -> Type:
-        match node:
-            case my_ast.EmptyExpression():
-                return Unit()
-
-            case my_ast.Literal():
-                if isinstance(node.value, bool):
-                    return Bool()
-                elif isinstance(node.value, int):
-                    return Int()
-                elif isinstance(node.value, NoneType):
-                    return Unit()
-                else:
-                    raise TypeError(
-                        f"{node.value} is not an integer, a boolean or NoneType")
-
-            case my_ast.Identifier():
-                value = type_table.lookup(node.name)
-                if not value:
-                    raise Exception(
-                        f"'{node.name}' is not defined")
-                return value
 
-            case my_ast.Variable():
-                value_type = typecheck(node.value, type_table)
-                if not isinstance(node.type, Unit) and node.type != value_type:
-                    raise Exception(f"No")
-                type_table.add(node.name, value_type)
-                return Unit()
-
-            case my_ast.UnaryOp():
-                target_type = typecheck(node.target, type_table)
-                if node.op == "unary_-" and not isinstance(target_type, Int):
-                    raise Exception("target for '-' was not an Int")
-                elif node.op == "unary_not" and not isinstance(target_type, Bool):
-                    raise Exception("target for 'not' was not a Bool")
-                return target_type
-
-            case my_ast.BinaryOp():
-                left_type = typecheck(node.left, type_table)
-                right_type = typecheck(node.right, type_table)
-
-                if node.op == "=":
-                    if left_type != right_type:
-                        raise TypeError()
-                    return left_type
-                elif node.op in ["==", "!="]:
-                    if left_type != right_type:
-                        raise TypeError()
-                    return Bool()
-
-                fun_type = type_table.lookup(node.op)
-
-                if not isinstance(fun_type, FunType):
-                    raise Exception(
-                        f"'{node.op}' does not have a matching type in the TypeTable")
-                if left_type.__class__ != fun_type.type_args[0].__class__:
-                    raise TypeError(
-                        f"Expected argument 1 to be {fun_type.type_args[0]}, but got {left_type}")
-                if right_type.__class__ != fun_type.type_args[1].__class__:
-                    raise TypeError(
-                        f"Expected argument 2 to be {fun_type.type_args[1]}, but got {right_type}")
-                return fun_type.return_type
-
-            case my_ast.IfThen():
-                t1 = typecheck(node.if_expr, type_table)
-                if not isinstance(t1, Bool):
-                    raise Exception("If expression value was not a Bool")
-                t2 = typecheck(node.then_expr, type_table)
-                return Unit()
-
-            case my_ast.IfThenElse():
-                t1 = typecheck(node.if_expr, type_table)
-                if not isinstance(t1, Bool):
-                    raise Exception(
-                        f"The type for '{node.if_expr}' was not a Bool")
-                t2 = typecheck(node.then_expr, type_table)
-                t3 = typecheck(node.else_expr, type_table)
-                if t2 != t3:
-                    raise Exception(
-                        "Then expr and else expr are not the same type")
-                return t2  # or t3, they are the same type
-
-            case my_ast.WhileDo():
-                if not isinstance(typecheck(node.condition, type_table), Bool):
-                    raise Exception(
-                        "The condition for the while loop does not result in a Bool")
-                return Unit()
-
-            case my_ast.FunctionCall():
-                fun_type = type_table.lookup(node.name)
-                if not fun_type:
-                    raise Exception(
-                        f"'{node.name}' is not defined in TypeTable")
-                if not isinstance(fun_type, FunType):
-                    raise Exception(
-                        f"TypeTable has function {node.name}, but its value is not a FunType!")
-
-                for arg, proper_type, index in zip(node.args, fun_type.type_args, range(1, len(node.args) + 1), strict=True):
-                    if not isinstance(typecheck(arg, type_table), proper_type.__class__):
-                        raise Exception(
-                            f"Argument {index} for function '{node.name}' was not {proper_type}")
-
-                return fun_type.return_type
-
-            case my_ast.Block():
-                block_type_table = TypeTable(locals=None, parent=type_table)
-                block_exprs: List[Type] = []
-                for expr in node.expressions:
-                    t = typecheck(expr, block_type_table)
-                    block_exprs.append(t)
-
-                if node.returns_last:
-                    return_type = block_exprs[-1]
-                    if not isinstance(return_type, (Int | Bool | Unit)):
-                        raise Exception(
-                            "Block return type was not a basic type")
-                    return return_type
-                return Unit()
-
-            case my_ast.TopLevel():
-                top_exprs: List[Type] = []
-                for expr in node.expressions:
-                    t = typecheck(expr, type_table)
-                    top_exprs.append(t)
-
-                if node.returns_last:
-                    return top_exprs[-1]
-                return Unit()
-
-            case _:
-                print(node)
-                raise Exception("No typecheck match for this Expression type")
+def _type_literal(node: my_ast.Literal, type_table: TypeTable) -> Type:
+    # exact type checks, as in the IR generator's _LIT_LOAD: one pointer
+    # compare each, and bool (a subclass of int) cannot be misread
+    value = node.value
+    if type(value) is bool:
+        return BOOL
+    elif type(value) is int:
+        return INT
+    elif value is None:
+        return UNIT
+    else:
+        raise TypeError(
+            f"{value} is not an integer, a boolean or NoneType")
+
+
+def _type_identifier(node: my_ast.Identifier, type_table: TypeTable) -> Type:
+    value = type_table.lookup(node.name)
+    if not value:
+        raise Exception(
+            f"'{node.name}' is not defined")
+    return value
+
+
+def _type_variable(node: my_ast.Variable, type_table: TypeTable) -> Type:
+    value_type = _typecheck(node.value, type_table)
+    if not isinstance(node.type, Unit) and node.type != value_type:
+        raise Exception(f"No")
+    type_table.add(node.name, value_type)
+    return UNIT
+
+
+def _type_unary_op(node: my_ast.UnaryOp, type_table: TypeTable) -> Type:
+    target_type = _typecheck(node.target, type_table)
+    if node.op == "unary_-" and not isinstance(target_type, Int):
+        raise Exception("target for '-' was not an Int")
+    elif node.op == "unary_not" and not isinstance(target_type, Bool):
+        raise Exception("target for 'not' was not a Bool")
+    return target_type
+
+
+def _type_binary_op(node: my_ast.BinaryOp, type_table: TypeTable) -> Type:
+    left_type = _typecheck(node.left, type_table)
+    right_type = _typecheck(node.right, type_table)
+
+    # the basic types are singletons and FunTypes flow through the type
+    # table as shared objects, so identity checks suffice here
+    if node.op == "=":
+        if left_type is not right_type:
+            raise TypeError()
+        return left_type
+    elif node.op in ["==", "!="]:
+        if left_type is not right_type:
+            raise TypeError()
+        return BOOL
+
+    # operators cannot be shadowed by user code, so their signatures always
+    # come from the pre-unpacked builtin table: one probe, no scope-chain walk
+    sig = _BINOP_SIGS.get(node.op)
+    if sig is None:
+        fun_type = type_table.lookup(node.op)
+        if not isinstance(fun_type, FunType):
+            raise Exception(
+                f"'{node.op}' does not have a matching type in the TypeTable")
+        sig = (fun_type.type_args[0], fun_type.type_args[1],
+               fun_type.return_type)
+    arg1_type, arg2_type, return_type = sig
+    if left_type is not arg1_type:
+        raise TypeError(
+            f"Expected argument 1 to be {arg1_type}, but got {left_type}")
+    if right_type is not arg2_type:
+        raise TypeError(
+            f"Expected argument 2 to be {arg2_type}, but got {right_type}")
+    return return_type
+
+
+def _type_if_then(node: my_ast.IfThen, type_table: TypeTable) -> Type:
+    t1 = _typecheck(node.if_expr, type_table)
+    if not isinstance(t1, Bool):
+        raise Exception("If expression value was not a Bool")
+    _typecheck(node.then_expr, type_table)
+    return UNIT
+
 
+def _type_if_then_else(node: my_ast.IfThenElse, type_table: TypeTable) -> Type:
+    t1 = _typecheck(node.if_expr, type_table)
+    if not isinstance(t1, Bool):
+        raise Exception(
+            f"The type for '{node.if_expr}' was not a Bool")
+    t2 = _typecheck(node.then_expr, type_table)
+    t3 = _typecheck(node.else_expr, type_table)
+    if t2 is not t3:
+        raise Exception(
+            "Then expr and else expr are not the same type")
+    return t2  # or t3, they are the same type
+
+
+def _type_while_do(node: my_ast.WhileDo, type_table: TypeTable) -> Type:
+    if not isinstance(_typecheck(node.condition, type_table), Bool):
+        raise Exception(
+            "The condition for the while loop does not result in a Bool")
+    return UNIT
+
+
+def _type_function_call(node: my_ast.FunctionCall, type_table: TypeTable) -> Type:
+    fun_type = type_table.lookup(node.name)
+    if not fun_type:
+        raise Exception(
+            f"'{node.name}' is not defined in TypeTable")
+    if not isinstance(fun_type, FunType):
+        raise Exception(
+            f"TypeTable has function {node.name}, but its value is not a FunType!")
+
+    for arg, proper_type, index in zip(node.args, fun_type.type_args, range(1, len(node.args) + 1), strict=True):
+        if not isinstance(_typecheck(arg, type_table), proper_type.__class__):
+            raise Exception(
+                f"Argument {index} for function '{node.name}' was not {proper_type}")
+
+    return fun_type.return_type
+
+
+def _type_block(node: my_ast.Block, type_table: TypeTable) -> Type:
+    block_type_table = TypeTable(locals=None, parent=type_table)
+    # only the last expression's type can be the block's type, so there is
+    # no need to keep the earlier ones around
+    last_type: Type = UNIT
+    for expr in node.expressions:
+        last_type = _typecheck(expr, block_type_table)
+
+    if node.returns_last:
+        if not isinstance(last_type, (Int | Bool | Unit)):
+            raise Exception(
+                "Block return type was not a basic type")
+        return last_type
+    return UNIT
+
+
+def _type_top_level(node: my_ast.TopLevel, type_table: TypeTable) -> Type:
+    last_type: Type = UNIT
+    for expr in node.expressions:
+        last_type = _typecheck(expr, type_table)
+
+    if node.returns_last:
+        return last_type
+    return UNIT
+
+
+# one dict lookup on the node's class instead of matching against every
+# node pattern in turn, like the IR generator's handler table
+# (Callable[..., ...]: each handler narrows the node parameter to its own
+# node class)
+_TYPE_HANDLERS: dict[type, Callable[..., Type]] = {
+    my_ast.EmptyExpression: _type_empty_expression,
+    my_ast.Literal: _type_literal,
+    my_ast.Identifier: _type_identifier,
+    my_ast.Variable: _type_variable,
+    my_ast.UnaryOp: _type_unary_op,
+    my_ast.BinaryOp: _type_binary_op,
+    my_ast.IfThen: _type_if_then,
+    my_ast.IfThenElse: _type_if_then_else,
+    my_ast.WhileDo: _type_while_do,
+    my_ast.FunctionCall: _type_function_call,
+    my_ast.Block: _type_block,
+    my_ast.TopLevel: _type_top_level,
+}
+
+
+def _typecheck(node: my_ast.Expression, type_table: TypeTable) -> Type:
+    """The recursive worker behind typecheck(): assumes node and type_table
+    are both present, so the per-node cost is one handler dispatch."""
+    handler = _TYPE_HANDLERS.get(type(node))
+    if handler is None:
+        print(node)
+        raise Exception("No typecheck match for this Expression type")
+    node.type = handler(node, type_table)
+    return node.type
+
+
+def typecheck(node: my_ast.Expression | None, type_table: TypeTable | None = None) -> Type:
+    """Gets the type of the node from its handler, then sets node.type to that type and returns the type.
+    Used to recursively set the type information for each node inside a root expression."""
     if node is None:
-        return Unit()
+        return UNIT
     if type_table is None:
         type_table = TypeTable()
-    node.type = get_type(node, type_table)
-    return node.type
+    return _typecheck(node, type_table)
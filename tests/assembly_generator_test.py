@@ -1,3 +1,10 @@
+import os
+import subprocess
+import tempfile
+
+import pytest
+
+from compiler.assembler import assemble_and_get_executable
 from compiler.assembly_generator import generate_assembly
 from compiler.ir_generator import generate_ir
 from compiler.parser import parse
@@ -22,3 +29,35 @@ def test_basics() -> None:
 
     generate_assembly(generate_ir(reserved_names=None, root_expr=parse(
         tokenize("print_int(1)"))))
+
+
+def _run_compiled(source_code: str) -> str:
+    """Assembles <source_code> into an executable, runs it and returns
+    its stdout, so a test can check what the generated code computes."""
+    assembly_code = generate_assembly(generate_ir(
+        reserved_names=None, root_expr=parse(tokenize(source_code))))
+    executable = assemble_and_get_executable(assembly_code)
+    with tempfile.NamedTemporaryFile(delete=False) as file:
+        file.write(executable)
+        path = file.name
+    try:
+        os.chmod(path, 0o755)
+        return subprocess.run([path], capture_output=True,
+                              text=True, check=True).stdout
+    finally:
+        os.unlink(path)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("source_code,expected", [
+    # constant-armed ifs take the branchless cmov path; a 0 (or false)
+    # in either arm must survive the peephole's zero-store rewrite
+    ("var c = false; var r = if c then 0 else 5; print_int(r)", "5\n"),
+    ("var c = true; var r = if c then 0 else 5; print_int(r)", "0\n"),
+    ("var c = false; var r = if c then 7 else 0; print_int(r)", "0\n"),
+    ("var c = true; var r = if c then 7 else 0; print_int(r)", "7\n"),
+    ("var c = true; var r = if c then 3 else 4; print_int(r)", "3\n"),
+    ("var c = false; print_bool(if c then true else false)", "false\n"),
+])
+def test_compiled_constant_if(source_code: str, expected: str) -> None:
+    assert _run_compiled(source_code) == expected
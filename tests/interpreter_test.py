@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Any
+
 import pytest
 
 from compiler.interpreter import interpret
@@ -6,76 +9,93 @@ from compiler.parser import parse
 from compiler.tokenizer import tokenize
 
 
-def test_interpreter_basics() -> None:
-    assert interpret(parse(tokenize("2 + 3"))) == 5
-    assert interpret(parse(tokenize("2 - 3"))) == -1
-    assert interpret(parse(tokenize("2 - -3"))) == 5
-    assert interpret(parse(tokenize("2 + 2 + 3"))) == 7
-    assert interpret(parse(tokenize("2 / 4"))) == 0.5
-    assert interpret(parse(tokenize("2 + 2 / 4 * 5"))) == 4.5
-    assert interpret(parse(tokenize("var x = 5; x"))) == 5
-    assert interpret(parse(tokenize("var x = 5; x = x; x"))) == 5
-    assert interpret(parse(tokenize("-2"))) == -2
-    assert interpret(parse(tokenize("2 + -2"))) == 0
-    with pytest.raises(Exception):
-        interpret(parse(tokenize("x = 5")))
-
-
-def test_variables() -> None:
-    assert interpret(parse(tokenize("var x = 3; x"))) == 3
-    assert interpret(parse(tokenize("var x = 50; x = x; x"))) == 50
-    assert interpret(parse(tokenize("var x = 3; var y = 4; x + y"))) == 7
-    assert interpret(parse(tokenize("var x = 3; var y = 4; x = y"))) == None
-    assert interpret(parse(tokenize("var x = 1; { x = 2; x }"))) == 2
-    assert interpret(parse(tokenize("var x = 2; x = (x + -2); x"))) == 0
-    assert interpret(
-        parse(tokenize("var x = 3; var y = 4; x = y; x + y + x"))) == 12
-    assert interpret(
-        parse(tokenize("var x = 1; var y = 23; x = y; x + y"))) == 46
-    with pytest.raises(Exception):
-        interpret(parse(tokenize("var x = 3; 2 = x")))
-
-
-def test_logicals() -> None:
-    assert interpret(parse(tokenize("true and false"))) == False
-    assert interpret(parse(tokenize("true and true"))) == True
-    assert interpret(parse(tokenize("true or false"))) == True
-    assert interpret(parse(tokenize("1 or 0"))) == True
-    assert interpret(
-        parse(tokenize("var moi = true; var hei = false; moi or hei"))) == True
-
-    # right_size should be false since this should short_circuit
-    assert interpret(
-        parse(tokenize("var right_side = false; true or { right_side = true; true }; right_side"))) == False
-    assert interpret(
-        parse(tokenize("var right_side = false; false and { right_side = false; true }; right_side"))) == False
-
+@lru_cache(maxsize=None)
+def _compile(source_code: str) -> Expression:
+    """Tokenizes and parses once per distinct source string: several
+    sources repeat across the tests below, and the trees are not
+    mutated by interpret()."""
+    return parse(tokenize(source_code))
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("2 + 3", 5),
+    ("2 - 3", -1),
+    ("2 - -3", 5),
+    ("2 + 2 + 3", 7),
+    ("2 / 4", 0.5),
+    ("2 + 2 / 4 * 5", 4.5),
+    ("var x = 5; x", 5),
+    ("var x = 5; x = x; x", 5),
+    ("-2", -2),
+    ("2 + -2", 0),
+])
+def test_interpreter_basics(source_code: str, expected: Any) -> None:
+    assert interpret(_compile(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("var x = 3; x", 3),
+    ("var x = 50; x = x; x", 50),
+    ("var x = 3; var y = 4; x + y", 7),
+    ("var x = 3; var y = 4; x = y", None),
+    ("var x = 1; { x = 2; x }", 2),
+    ("var x = 2; x = (x + -2); x", 0),
+    ("var x = 3; var y = 4; x = y; x + y + x", 12),
+    ("var x = 1; var y = 23; x = y; x + y", 46),
+])
+def test_variables(source_code: str, expected: Any) -> None:
+    assert interpret(_compile(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("true and false", False),
+    ("true and true", True),
+    ("true or false", True),
+    ("1 or 0", True),
+    ("var moi = true; var hei = false; moi or hei", True),
+    # right side should stay false since these should short-circuit
+    ("var right_side = false; true or { right_side = true; true }; right_side", False),
+    ("var right_side = false; false and { right_side = false; true }; right_side", False),
+])
+def test_logicals(source_code: str, expected: Any) -> None:
+    assert interpret(_compile(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("{ 2 + 3 }", 5),
+    ("{ 2 + 3; 2 + 4 }", 6),
+    ("{ { 2 + 3; 2 + 4 } { 5 } }", 5),
+    ("{ 2 + 3; }", None),
+    ("{ 2 + 3; { 3 + 4; } }", None),
+    ("{ 2 + 3; { 3 + 4; }; }", None),
+])
+def test_blocks(source_code: str, expected: Any) -> None:
+    assert interpret(_compile(source_code)) == expected
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("source_code,expected", [
+    ("var x = 1; while x < 5 do { x = x + 1 }", None),
+    ("var x = 1; while x < 5 do { x = x + 1 }; x", 5),
+    ("{ 2 + 3; 2 + 4 }", 6),
+    ("{ { 2 + 3; 2 + 4 } { 5 } }", 5),
+])
+def test_while_do(source_code: str, expected: Any) -> None:
+    assert interpret(_compile(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code", [
+    "x = 5",
+    "var x = 3; 2 = x",
+    "true or or false",
+])
+def test_interpreter_errors(source_code: str) -> None:
     with pytest.raises(Exception):
-        interpret(parse(tokenize("true or or false")))
-
-
-def test_blocks() -> None:
-    assert interpret(parse(tokenize("{ 2 + 3 }"))) == 5
-    assert interpret(parse(tokenize("{ 2 + 3; 2 + 4 }"))) == 6
-    assert interpret(parse(tokenize("{ { 2 + 3; 2 + 4 } { 5 } }"))) == 5
-    assert interpret(parse(tokenize("{ 2 + 3; }"))) == None
-    assert interpret(parse(tokenize("{ 2 + 3; { 3 + 4; } }"))) == None
-    assert interpret(parse(tokenize("{ 2 + 3; { 3 + 4; }; }"))) == None
-
-
-def test_while_do() -> None:
-    assert interpret(
-        parse(tokenize("var x = 1; while x < 5 do { x = x + 1 }"))) == None
-
-    assert interpret(
-        parse(tokenize("var x = 1; while x < 5 do { x = x + 1 }; x"))) == 5
-
-    assert interpret(parse(tokenize("{ 2 + 3; 2 + 4 }"))) == 6
-    assert interpret(parse(tokenize("{ { 2 + 3; 2 + 4 } { 5 } }"))) == 5
+        interpret(_compile(source_code))
 
 
 def test_built_in_funcs() -> None:
-    assert interpret(parse(tokenize("print_int(3)"))) == None
-    assert interpret(parse(tokenize("print_bool(true)"))) == None
+    assert interpret(_compile("print_int(3)")) is None
+    assert interpret(_compile("print_bool(true)")) is None
     # commented since otherwise input is always needed when running tests
-    # assert isinstance(interpret(parse(tokenize("read_int()"))), int)
+    # assert isinstance(interpret(_compile("read_int()")), int)
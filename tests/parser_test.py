@@ -1,375 +1,358 @@
+from functools import lru_cache
+
 import pytest
 
-from compiler.my_ast import (BinaryOp, Block, EmptyExpression, FunctionCall,
-                             Identifier, IfThen, IfThenElse, Literal, TopLevel,
-                             UnaryOp, Variable, WhileDo)
+from compiler.my_ast import (BinaryOp, Block, EmptyExpression, Expression,
+                             FunctionCall, Identifier, IfThen, IfThenElse,
+                             Literal, TopLevel, UnaryOp, Variable, WhileDo)
 from compiler.my_types import Bool, FunType, Int, Unit
 from compiler.parser import parse
-from compiler.tokenizer import tokenize
-
-
-def test_parser_basics() -> None:
-    assert parse(tokenize("1")) == Literal(1)
-    assert parse(tokenize("1 + 2")) == BinaryOp(Literal(1), "+", Literal(2))
-    assert parse(tokenize("1 + 2 * 3 / 4")) == BinaryOp(Literal(1),
-                                                        "+",
-                                                        BinaryOp(BinaryOp(Literal(2),
-                                                                          "*",
-                                                                          Literal(3)),
-                                                                 "/",
-                                                                 Literal(4)))
-    assert parse(tokenize("a + b")) == BinaryOp(Identifier("a"),
-                                                "+", Identifier("b"))
-    assert parse(tokenize("hapsu + hapsu2")
-                 ) == BinaryOp(Identifier("hapsu"), "+", Identifier("hapsu2"))
-    assert parse(tokenize("true")) == Literal(True)
-
-
-def test_parentheses() -> None:
-    assert parse(tokenize("(1 + 2) + 3 * 4")) == BinaryOp(
-        BinaryOp(Literal(1),
-                 '+',
-                 Literal(2)),
-        '+',
-        BinaryOp(Literal(3),
-                 '*',
-                 Literal(4))
-    )
-    assert parse(tokenize("1 + (2 + 3) * 4")) == \
-        BinaryOp(Literal(1),
-                 '+',
-                 BinaryOp(BinaryOp(Literal(2),
-                                   "+",
-                                   Literal(3)),
-                          "*",
-                          Literal(4)))
+from compiler.tokenizer import Token, tokenize
+
+
+@lru_cache(maxsize=None)
+def _tok(source_code: str) -> list[Token]:
+    """Tokenizes each distinct source string once. The cached list is
+    safe to share: parse() copies it into the token list it consumes
+    and never mutates its argument."""
+    return tokenize(source_code)
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("1", Literal(1)),
+    ("1 + 2", BinaryOp(Literal(1), "+", Literal(2))),
+    ("1 + 2 * 3 / 4", BinaryOp(Literal(1),
+                               "+",
+                               BinaryOp(BinaryOp(Literal(2),
+                                                 "*",
+                                                 Literal(3)),
+                                        "/",
+                                        Literal(4)))),
+    ("a + b", BinaryOp(Identifier("a"), "+", Identifier("b"))),
+    ("hapsu + hapsu2", BinaryOp(Identifier("hapsu"),
+                                "+", Identifier("hapsu2"))),
+    ("true", Literal(True)),
+])
+def test_parser_basics(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("(1 + 2) + 3 * 4", BinaryOp(BinaryOp(Literal(1),
+                                          '+',
+                                          Literal(2)),
+                                 '+',
+                                 BinaryOp(Literal(3),
+                                          '*',
+                                          Literal(4)))),
+    ("1 + (2 + 3) * 4", BinaryOp(Literal(1),
+                                 '+',
+                                 BinaryOp(BinaryOp(Literal(2),
+                                                   "+",
+                                                   Literal(3)),
+                                          "*",
+                                          Literal(4)))),
+])
+def test_parentheses(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
 
 
 def test_empty_input() -> None:
-    assert parse(tokenize("")) == EmptyExpression()
-
-
-def test_garbage_at_end() -> None:
-    with pytest.raises(Exception):
-        parse(tokenize("1 + 2 xd"))
-    with pytest.raises(Exception):
-        parse(tokenize("1 + 2 +"))
-
-
-def test_if_then_else() -> None:
-    assert parse(tokenize("if 1 then 2")) == IfThen(Literal(1), Literal(2))
-    assert parse(tokenize("if 1 then 2 else 3 + 4")) == IfThenElse(Literal(1),
-                                                                   Literal(2),
-                                                                   BinaryOp(Literal(3),
-                                                                            "+",
-                                                                            Literal(4)))
-    assert parse(tokenize("if 1 then if 2 then 3 else  4 + 5 * 6 else 5")) == \
-        IfThenElse(Literal(1),
-                   IfThenElse(Literal(2),
-                              Literal(3),
-                              BinaryOp(Literal(4),
-                                       "+",
-                                       BinaryOp(Literal(5),
-                                                "*",
-                                                Literal(6)
-                                                )
+    assert parse(_tok("")) == EmptyExpression()
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("if 1 then 2", IfThen(Literal(1), Literal(2))),
+    ("if 1 then 2 else 3 + 4", IfThenElse(Literal(1),
+                                          Literal(2),
+                                          BinaryOp(Literal(3),
+                                                   "+",
+                                                   Literal(4)))),
+    ("if 1 then if 2 then 3 else  4 + 5 * 6 else 5",
+     IfThenElse(Literal(1),
+                IfThenElse(Literal(2),
+                           Literal(3),
+                           BinaryOp(Literal(4),
+                                    "+",
+                                    BinaryOp(Literal(5),
+                                             "*",
+                                             Literal(6)
+                                             )
+                                    )
+                           ),
+                Literal(5))),
+    ("if a then 2 else b + 4", IfThenElse(Identifier("a"),
+                                          Literal(2),
+                                          BinaryOp(Identifier("b"),
+                                                   "+",
+                                                   Literal(4)))),
+])
+def test_if_then_else(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("g(a, b, c, d)", FunctionCall("g", Identifier("a"),
+                                   Identifier("b"),
+                                   Identifier("c"),
+                                   Identifier("d"))),
+    ("g(1 + 2)", FunctionCall("g", BinaryOp(Literal(1), '+', Literal(2)))),
+])
+def test_functions(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("-a", UnaryOp("unary_-", Identifier("a"))),
+    ("not b", UnaryOp("unary_not", Identifier("b"))),
+    ("-1 + -2", BinaryOp(UnaryOp("unary_-", Literal(1)),
+                         "+",
+                         UnaryOp("unary_-", Literal(2)))),
+])
+def test_unary_parsing(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+# NOTE: these have to be right-associative!
+@pytest.mark.parametrize("source_code,expected", [
+    ("a = b", BinaryOp(Identifier("a"), "=", Identifier("b"))),
+    ("a = b = c", BinaryOp(Identifier("a"),
+                           "=",
+                           BinaryOp(Identifier("b"),
+                                    "=",
+                                    Identifier("c"))
+                           )),
+    ("a = b = c + 2", BinaryOp(Identifier("a"),
+                               "=",
+                               BinaryOp(Identifier("b"),
+                                        "=",
+                                        BinaryOp(Identifier("c"),
+                                                 "+",
+                                                 Literal(2))
+                                        )
+                               )),
+])
+def test_assignment_operator(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    (r"a * b + c / d", BinaryOp(BinaryOp(Identifier('a'),
+                                         r"*",
+                                         Identifier('b')),
+                                r"+",
+                                BinaryOp(Identifier('c'),
+                                         "/",
+                                         Identifier('d')))),
+    (r"a + b % c and d", BinaryOp(BinaryOp(Identifier('a'),
+                                           r"+",
+                                           BinaryOp(Identifier('b'),
+                                                    r"%",
+                                                    Identifier("c"))),
+                                  "and",
+                                  Identifier('d'))),
+    (r"a % if b * c + b then d else e",
+     BinaryOp(Identifier("a"),
+              r"%",
+              IfThenElse(BinaryOp(BinaryOp(Identifier("b"),
+                                           "*",
+                                           Identifier("c")),
+                                  "+",
+                                  Identifier("b")
+                                  ),
+                         Identifier("d"),
+                         Identifier("e")))),
+])
+def test_operator_precedence(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("{ x = 10 }", Block(BinaryOp(Identifier("x"),
+                                  "=",
+                                  Literal(10)),
+                         returns_last=True)),
+    ("{ x = 10;"
+     "True }", Block(BinaryOp(Identifier("x"),
+                              "=",
+                              Literal(10)),
+                     Identifier("True"), returns_last=True)),
+    ("{ a; }", Block(Identifier("a"))),
+    ("x = { f(a); b }", BinaryOp(Identifier("x"),
+                                 "=",
+                                 Block(FunctionCall("f",
+                                                    Identifier("a")),
+                                       Identifier("b"),
+                                       returns_last=True
                                        )
+                                 )),
+    # NOTE: might need to change this returns_last behaviour
+    ("{ { } }", Block(Block(), returns_last=True)),
+])
+def test_blocks(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+# these should only work directly, in top-level and in blocks, not in
+# e.g. "if True then var x = 1"
+@pytest.mark.parametrize("source_code,expected", [
+    ("var x = 1", Variable("x", Literal(1))),
+    ("var x = 3 * 4", Variable("x",
+                               BinaryOp(Literal(3), "*", Literal(4)))),
+    ("var x = 1; var y = 23; x = y; x + y",
+     TopLevel(Variable("x", Literal(1)),
+              Variable("y", Literal(23)),
+              BinaryOp(Identifier("x"), "=", Identifier("y")),
+              BinaryOp(Identifier("x"), "+", Identifier("y")), returns_last=True)),
+    ("var x = { var y = 1; y }",
+     Variable("x",
+              Block(Variable("y",
+                             Literal(1)),
+                    Identifier("y"),
+                    returns_last=True))),
+    ("var x = 1; { x = 2; x }",
+     TopLevel(Variable("x",
+                       Literal(1)),
+              Block(BinaryOp(Identifier("x"),
+                             "=",
+                             Literal(2)),
+                    Identifier("x"),
+                    returns_last=True), returns_last=True)),
+])
+def test_variable_declaration(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("{ { a } }", Block(Block(Identifier("a"),
+                              returns_last=True
                               ),
-                   Literal(5))
-
-    assert parse(tokenize("if a then 2 else b + 4")) == \
-        IfThenElse(Identifier("a"),
-                   Literal(2),
-                   BinaryOp(Identifier("b"),
-                            "+",
-                            Literal(4)))
-
-    with pytest.raises(Exception):
-        parse(tokenize("if 1 then 2 else"))
-    with pytest.raises(Exception):
-        parse(tokenize("if 1 else 2"))
-    with pytest.raises(Exception):
-        parse(tokenize("if 1"))
-    with pytest.raises(Exception):
-        parse(tokenize("if 1 then if 2 else 3"))
-
-
-def test_functions() -> None:
-    assert parse(tokenize("g(a, b, c, d)")) == \
-        FunctionCall("g", Identifier("a"),
-                     Identifier("b"),
-                     Identifier("c"),
-                     Identifier("d"))
-
-    assert parse(tokenize("g(1 + 2)")) == \
-        FunctionCall("g", BinaryOp(Literal(1), '+', Literal(2)))
-
-
-def test_unary_parsing() -> None:
-    assert parse(tokenize("-a")) == UnaryOp("unary_-", Identifier("a"))
-    assert parse(tokenize("not b")) == UnaryOp("unary_not", Identifier("b"))
-    assert parse(tokenize("-1 + -2")) == BinaryOp(UnaryOp("unary_-", Literal(1)),
-                                                  "+",
-                                                  UnaryOp("unary_-", Literal(2)))
-
-
-def test_assignment_operator() -> None:
-    # NOTE: these have to be right-associative!
-    assert parse(tokenize("a = b")) == BinaryOp(
-        Identifier("a"), "=", Identifier("b"))
-    assert parse(tokenize("a = b = c")) == BinaryOp(Identifier("a"),
-                                                    "=",
-                                                    BinaryOp(Identifier("b"),
-                                                             "=",
-                                                             Identifier("c"))
-                                                    )
-
-    assert parse(tokenize("a = b = c + 2")) == \
-        BinaryOp(Identifier("a"),
-                 "=",
-                 BinaryOp(Identifier("b"),
-                          "=",
-                          BinaryOp(Identifier("c"),
-                                   "+",
-                                   Literal(2))
-                          )
-                 )
-
-
-def test_operator_precedence() -> None:
-    assert parse(tokenize(r"a * b + c / d")) == BinaryOp(
-        BinaryOp(Identifier('a'),
-                 r"*",
-                 Identifier('b')),
-        r"+",
-        BinaryOp(Identifier('c'),
-                 "/",
-                 Identifier('d')))
-
-    assert parse(tokenize(r"a + b % c and d")) == BinaryOp(
-        BinaryOp(Identifier('a'),
-                 r"+",
-                 BinaryOp(Identifier('b'),
-                          r"%",
-                          Identifier("c"))),
-        "and",
-        Identifier('d'))
-
-    assert parse(tokenize(r"a % if b * c + b then d else e")) == BinaryOp(
-        Identifier("a"),
-        r"%",
-        IfThenElse(BinaryOp(BinaryOp(Identifier("b"),
-                                     "*",
-                                     Identifier("c")),
-                            "+",
-                            Identifier("b")
+                        returns_last=True
+                        )),
+    ("{ { a } { b } }", Block(Block(Identifier("a"), returns_last=True),
+                              Block(Identifier("b"), returns_last=True),
+                              returns_last=True)),
+    ("{ if true then { a } b }", Block(IfThen(Literal(True),
+                                              Block(Identifier("a"),
+                                                    returns_last=True
+                                                    )),
+                                       Identifier("b"),
+                                       returns_last=True)),
+    ("{ if true then { a }; b }", Block(IfThen(Literal(True),
+                                               Block(Identifier("a"),
+                                                     returns_last=True
+                                                     )),
+                                        Identifier("b"),
+                                        returns_last=True
+                                        )),
+    ("{ if true then { a } b; c }", Block(IfThen(Literal(True),
+                                                 Block(Identifier("a"),
+                                                       returns_last=True
+                                                       )),
+                                          Identifier("b"),
+                                          Identifier("c"),
+                                          returns_last=True
+                                          )),
+    ("{ if true then { a } else { b } c }",
+     Block(IfThenElse(Literal(True),
+                      Block(Identifier("a"),
+                            returns_last=True
                             ),
-                   Identifier("d"),
-                   Identifier("e"))
-    )
-
-
-def test_blocks() -> None:
-    assert parse(tokenize("{ x = 10 }")) == Block(
-        BinaryOp(Identifier("x"),
-                 "=",
-                 Literal(10)),
-        returns_last=True
-    )
-
-    assert parse(tokenize("{ x = 10;"
-                          "True }")) == \
-        Block(BinaryOp(Identifier("x"),
-                       "=",
-                       Literal(10)),
-              Identifier("True"), returns_last=True)
-
-    assert parse(tokenize("{ a; }")) == Block(
-        Identifier("a"))
-
-    assert parse(tokenize("x = { f(a); b }")) == \
-        BinaryOp(Identifier("x"),
-                 "=",
-                 Block(FunctionCall("f",
-                                    Identifier("a")),
-                       Identifier("b"),
-                       returns_last=True
-                       )
-                 )
-
-    # NOTE: might need to change this returns_last behaviour
-    assert parse(tokenize("{ { } }")) == Block(
-        Block(), returns_last=True)
-
-    with pytest.raises(Exception):
-        parse(tokenize("{ 1 + 2"
-                       "abc }"))
-    with pytest.raises(Exception):
-        parse(tokenize("{ 1 + 2 + { abc }; "))
-
-
-def test_variable_declaration() -> None:
-    # these should only work directly, in top-level and in blocks, not in e.g. "if True then var x = 1"
-    assert parse(tokenize("var x = 1")) == Variable("x", Literal(1))
-    assert parse(tokenize("var x = 3 * 4")) == Variable("x",
-                                                        BinaryOp(Literal(3), "*", Literal(4)))
-
-    assert parse(tokenize("var x = 1; var y = 23; x = y; x + y")) == \
-        TopLevel(Variable("x", Literal(1)),
-                 Variable("y", Literal(23)),
-                 BinaryOp(Identifier("x"), "=", Identifier("y")),
-                 BinaryOp(Identifier("x"), "+", Identifier("y")), returns_last=True)
-
-    assert parse(tokenize("var x = { var y = 1; y }")) == \
-        Variable("x",
-                 Block(Variable("y",
-                                Literal(1)),
-                       Identifier("y"),
-                       returns_last=True))
-
-    assert parse(tokenize("var x = 1; { x = 2; x }")) == \
-        TopLevel(Variable("x",
-                          Literal(1)),
-                 Block(BinaryOp(Identifier("x"),
-                                "=",
-                                Literal(2)),
-                       Identifier("x"),
-                       returns_last=True), returns_last=True)
-
-    with pytest.raises(Exception):
-        parse(tokenize("var x = var y"))
-    with pytest.raises(Exception):
-        parse(tokenize("if True then var x = 1 else var y = 2"))
-
-
-def test_advanced_blocks() -> None:
-    assert parse(tokenize("{ { a } }")) == \
-        Block(Block(Identifier("a"),
+                      Block(Identifier("b"),
+                            returns_last=True
+                            )),
+           Identifier("c"),
+           returns_last=True
+           )),
+    ("x = { { f(a) } { b } }",
+     BinaryOp(Identifier("x"),
+              "=",
+              Block(Block(FunctionCall("f",
+                                       Identifier("a")),
+                          returns_last=True
+                          ),
+                    Block(Identifier("b"),
+                          returns_last=True
+                          ),
                     returns_last=True
                     ),
-              returns_last=True
-              )
-
-    assert parse(tokenize("{ { a } { b } }")) == \
-        Block(Block(Identifier("a"), returns_last=True),
-              Block(Identifier("b"), returns_last=True),
-              returns_last=True)
-
-    assert parse(tokenize("{ if true then { a } b }")) == \
-        Block(IfThen(Literal(True),
-                     Block(Identifier("a"),
-                           returns_last=True
-                           )),
-              Identifier("b"),
-              returns_last=True)
-
-    assert parse(tokenize("{ if true then { a }; b }")) == \
-        Block(IfThen(Literal(True),
-                     Block(Identifier("a"),
-                           returns_last=True
-                           )),
-              Identifier("b"),
-              returns_last=True
-              )
-
-    with pytest.raises(Exception):
-        parse(tokenize("{ a b }"))
-
-    with pytest.raises(Exception):
-        parse(tokenize("{ if true then { a } b c }"))
-
-    assert parse(tokenize("{ if true then { a } b; c }")) == \
-        Block(IfThen(Literal(True),
-                     Block(Identifier("a"),
-                           returns_last=True
-                           )),
-              Identifier("b"),
-              Identifier("c"),
-              returns_last=True
-              )
-
-    assert parse(tokenize("{ if true then { a } else { b } c }")) == \
-        Block(IfThenElse(Literal(True),
-                         Block(Identifier("a"),
-                               returns_last=True
-                               ),
-                         Block(Identifier("b"),
-                               returns_last=True
-                               )),
-              Identifier("c"),
-              returns_last=True
-              )
-
-    assert parse(tokenize("x = { { f(a) } { b } }")) == \
-        BinaryOp(Identifier("x"),
-                 "=",
-                 Block(Block(FunctionCall("f",
-                                          Identifier("a")),
-                             returns_last=True
-                             ),
-                       Block(Identifier("b"),
-                             returns_last=True
-                             ),
-                       returns_last=True
+              )),
+])
+def test_advanced_blocks(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+@pytest.mark.parametrize("source_code,expected", [
+    ("a = 1;", TopLevel(BinaryOp(Identifier("a"), "=", Literal(1)))),
+    ("a = 1; b + 2", TopLevel(BinaryOp(Identifier("a"),
+                                       "=",
+                                       Literal(1)),
+                              BinaryOp(Identifier("b"),
+                                       "+",
+                                       Literal(2)), returns_last=True)),
+    (" true; b = { x }", TopLevel(Literal(True),
+                                  BinaryOp(Identifier("b"),
+                                           "=",
+                                           Block(Identifier("x"),
+                                                 returns_last=True)
+                                           ), returns_last=True)),
+    ("a = 1; b = { x = 2; x }; f(a);",
+     TopLevel(BinaryOp(Identifier("a"),
+                       "=",
+                       Literal(1)
                        ),
-                 )
-
-
-def test_top_level_blocks() -> None:
-    assert parse(tokenize("a = 1;")) == \
-        TopLevel(BinaryOp(Identifier("a"), "=", Literal(1)))
-
-    assert parse(tokenize("a = 1; b + 2")) == \
-        TopLevel(BinaryOp(Identifier("a"),
-                          "=",
-                          Literal(1)),
-                 BinaryOp(Identifier("b"),
-                          "+",
-                          Literal(2)), returns_last=True)
-
-    assert parse(tokenize(" true; b = { x }")) == \
-        TopLevel(Literal(True),
-                 BinaryOp(Identifier("b"),
-                          "=",
-                          Block(Identifier("x"), returns_last=True)
-                          ), returns_last=True)
-
-    assert parse(tokenize("a = 1; b = { x = 2; x }; f(a);")) == \
-        TopLevel(BinaryOp(Identifier("a"),
-                          "=",
-                          Literal(1)
-                          ),
-                 BinaryOp(Identifier("b"),
-                          "=",
-                          Block(BinaryOp(Identifier("x"),
-                                         "=",
-                                         Literal(2)),
-                                Identifier("x"), returns_last=True
-                                )
-                          ),
-                 FunctionCall("f",
-                              Identifier("a"))
-                 )
+              BinaryOp(Identifier("b"),
+                       "=",
+                       Block(BinaryOp(Identifier("x"),
+                                      "=",
+                                      Literal(2)),
+                             Identifier("x"), returns_last=True
+                             )
+                       ),
+              FunctionCall("f",
+                           Identifier("a"))
+              )),
+])
+def test_top_level_blocks(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
 
 
 def test_while_do() -> None:
-    assert parse(tokenize("while x do f(x)")) == \
+    assert parse(_tok("while x do f(x)")) == \
         WhileDo(Identifier("x"), FunctionCall("f", Identifier("x")))
 
 
-def test_typing() -> None:
-    assert parse(tokenize("var x: Int = 1")) == Variable(
-        "x", Literal(1), type=Int())
-    assert parse(tokenize("var x: Bool = true")) == Variable(
-        "x", Literal(True), type=Bool())
-    assert parse(tokenize("var x: Bool = true; x")) == \
-        TopLevel(Variable("x",
-                          Literal(True),
-                          type=Bool()),
-                 Identifier("x"),
-                 returns_last=True)
-
-    with pytest.raises(Exception):
-        parse(tokenize("var x: ABC = true"))
+@pytest.mark.parametrize("source_code,expected", [
+    ("var x: Int = 1", Variable("x", Literal(1), type=Int())),
+    ("var x: Bool = true", Variable("x", Literal(True), type=Bool())),
+    ("var x: Bool = true; x", TopLevel(Variable("x",
+                                                Literal(True),
+                                                type=Bool()),
+                                       Identifier("x"),
+                                       returns_last=True)),
+])
+def test_typing(source_code: str, expected: Expression) -> None:
+    assert parse(_tok(source_code)) == expected
+
+
+# every source the parser must reject, in one table: garbage after the
+# expression, malformed conditionals, blocks, declarations and type hints
+@pytest.mark.parametrize("source_code", [
+    "1 + 2 xd",
+    "1 + 2 +",
+    "if 1 then 2 else",
+    "if 1 else 2",
+    "if 1",
+    "if 1 then if 2 else 3",
+    "{ 1 + 2" "abc }",
+    "{ 1 + 2 + { abc }; ",
+    "var x = var y",
+    "if True then var x = 1 else var y = 2",
+    "{ a b }",
+    "{ if true then { a } b c }",
+    "var x: ABC = true",
+    "var x: bool = true",
+])
+def test_parser_rejects(source_code: str) -> None:
     with pytest.raises(Exception):
-        parse(tokenize("var x: bool = true"))
+        parse(_tok(source_code))
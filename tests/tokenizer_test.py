@@ -1,11 +1,11 @@
-from compiler.tokenizer import SourceLocation, Token, TokenType, tokenize
+from compiler.tokenizer import ANY_LOCATION, Token, TokenType, tokenize
 
 
 def test_tokenizer_basics() -> None:
     assert tokenize("if  3\nwhile ") == [
-        Token("if", TokenType.IDENTIFIER, SourceLocation(any=True)),
-        Token("3", TokenType.LITERAL, SourceLocation(any=True)),
-        Token("while", TokenType.IDENTIFIER, SourceLocation(any=True))]
+        Token("if", TokenType.IDENTIFIER, ANY_LOCATION),
+        Token("3", TokenType.LITERAL, ANY_LOCATION),
+        Token("while", TokenType.IDENTIFIER, ANY_LOCATION)]
 
 
 def test_empty_code() -> None:
@@ -18,39 +18,39 @@ def test_empty_code() -> None:
 
 def test_operators() -> None:
     assert tokenize("2 + 2") == [
-        Token("2", TokenType.LITERAL, SourceLocation(any=True)),
-        Token("+", TokenType.OPERATOR, SourceLocation(any=True)),
-        Token("2", TokenType.LITERAL, SourceLocation(any=True))
+        Token("2", TokenType.LITERAL, ANY_LOCATION),
+        Token("+", TokenType.OPERATOR, ANY_LOCATION),
+        Token("2", TokenType.LITERAL, ANY_LOCATION)
     ]
     assert tokenize("2 + -2") == [
-        Token("2", TokenType.LITERAL, SourceLocation(any=True)),
-        Token("+", TokenType.OPERATOR, SourceLocation(any=True)),
-        Token("-", TokenType.OPERATOR, SourceLocation(any=True)),
-        Token("2", TokenType.LITERAL, SourceLocation(any=True))
+        Token("2", TokenType.LITERAL, ANY_LOCATION),
+        Token("+", TokenType.OPERATOR, ANY_LOCATION),
+        Token("-", TokenType.OPERATOR, ANY_LOCATION),
+        Token("2", TokenType.LITERAL, ANY_LOCATION)
     ]
 
     assert tokenize(">===<=<") == [
-        Token(">=", TokenType.OPERATOR, SourceLocation(any=True)),
-        Token("==", TokenType.OPERATOR, SourceLocation(any=True)),
-        Token("<=", TokenType.OPERATOR, SourceLocation(any=True)),
-        Token("<", TokenType.OPERATOR, SourceLocation(any=True))
+        Token(">=", TokenType.OPERATOR, ANY_LOCATION),
+        Token("==", TokenType.OPERATOR, ANY_LOCATION),
+        Token("<=", TokenType.OPERATOR, ANY_LOCATION),
+        Token("<", TokenType.OPERATOR, ANY_LOCATION)
     ]
 
 
 def test_punctuation() -> None:
     assert tokenize("(hello world)") == [
-        Token("(", TokenType.PUNCTUATION, SourceLocation(any=True)),
+        Token("(", TokenType.PUNCTUATION, ANY_LOCATION),
         Token("hello", TokenType.IDENTIFIER,
-              SourceLocation(any=True)),
+              ANY_LOCATION),
         Token("world", TokenType.IDENTIFIER,
-              SourceLocation(any=True)),
-        Token(")", TokenType.PUNCTUATION, SourceLocation(any=True))
+              ANY_LOCATION),
+        Token(")", TokenType.PUNCTUATION, ANY_LOCATION)
     ]
     assert tokenize("\n{25};") == [
-        Token("{", TokenType.PUNCTUATION, SourceLocation(any=True)),
-        Token("25", TokenType.LITERAL, SourceLocation(any=True)),
-        Token("}", TokenType.PUNCTUATION, SourceLocation(any=True)),
-        Token(";", TokenType.PUNCTUATION, SourceLocation(any=True)),
+        Token("{", TokenType.PUNCTUATION, ANY_LOCATION),
+        Token("25", TokenType.LITERAL, ANY_LOCATION),
+        Token("}", TokenType.PUNCTUATION, ANY_LOCATION),
+        Token(";", TokenType.PUNCTUATION, ANY_LOCATION),
     ]
 
 
@@ -61,7 +61,7 @@ def test_comments() -> None:
                     while
                     world!""") == [
         Token("while", TokenType.IDENTIFIER,
-              SourceLocation(any=True)),
+              ANY_LOCATION),
         Token("world", TokenType.IDENTIFIER,
-              SourceLocation(any=True)),
+              ANY_LOCATION),
     ]